@@ -8,14 +8,153 @@
 # ==============================================================================
 
 # /config_generator/codegens/base_generator.py
+import os
+import functools
+import concurrent.futures
+import weakref
+from dataclasses import dataclass
+from types import SimpleNamespace
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, ModuleLoader, Template
+import inflection
+from ..models import PARALLEL_MIN_TABLES, PRIMITIVE_TYPE_NAMES
+from ..writers import parse_type_string, parse_unified_syntax
 
 # 为了避免循环导入，并让类型提示工具正常工作
 if TYPE_CHECKING:
     from ..models import ConfigTable
     from ..readers import TypeSystem
 
+# 进程内共享的 Jinja2 环境，按 (模板目录, 环境选项) 缓存，避免每个生成器实例重复构建
+_ENV_CACHE: dict[tuple, Environment] = {}
+
+# 与目标语言无关的解析缓存，按 TypeSystem 实例共享。
+# 同一次运行中为多种语言生成代码时，类型查找与类型解析只需进行一次
+_SHARED_CACHES: 'weakref.WeakKeyDictionary[TypeSystem, SimpleNamespace]' = weakref.WeakKeyDictionary()
+
+# 带缓存的命名转换函数。inflection 内部基于正则替换，而同一批名称会在生成过程中被反复转换
+camelize = functools.lru_cache(maxsize=4096)(inflection.camelize)
+underscore = functools.lru_cache(maxsize=4096)(inflection.underscore)
+
+@functools.lru_cache(maxsize=4096)
+def split_target(target_path: str) -> tuple[str, str]:
+    """将类型的目标路径（如 'Common/Item'）拆分为 (类名, 子路径)，结果按路径缓存。"""
+    return os.path.basename(target_path), os.path.dirname(target_path)
+
+def _is_compiled_pack_fresh(pack_path: str, templates_dir: str) -> bool:
+    """预编译模板包存在且不早于模板目录中最新的模板文件时，才认为它可用。"""
+    try:
+        pack_mtime = os.stat(pack_path).st_mtime
+        with os.scandir(templates_dir) as entries:
+            return all(entry.stat().st_mtime <= pack_mtime for entry in entries if entry.is_file())
+    except OSError:
+        return False
+
+def camel_case(word: str) -> str:
+    """转换为首字母小写的驼峰命名，复用 `camelize` 的缓存。"""
+    return camelize(word, False)
+
+@dataclass
+class TypeInfo:
+    """
+    一个类型表达式的语言无关解析结果，由 `BaseCodeGenerator._analyze_type` 生成并缓存。
+    集合类型的元素信息递归地保存在 `inner` 中，调用方无需再次解析类型字符串。
+    """
+    type_str: str                   # 去掉分隔符部分后的类型字符串，如 'list(Item)'
+    collection: str | None          # 集合种类 (list/set/array)，非集合为 None
+    inner: 'TypeInfo | None'        # 集合元素的类型信息，非集合为 None
+    is_primitive: bool = False      # 是否为基元类型 (int/long/string/bool/float)
+    is_complex: bool = False        # 是否为包含字段的自定义类型
+    is_enum: bool = False           # 是否为枚举类型
+
+def _field_type_syntaxes(type_def: dict) -> list[str]:
+    """返回类型定义中各字段的类型语法，兼容 FieldTypes 字典与 FieldSequence 字段列表两种元数据格式。"""
+    field_types = type_def.get("FieldTypes")
+    if field_types is not None:
+        return list(field_types.values())
+    return [field_def["Type"] for field_def in type_def.get("FieldSequence", [])]
+
+class DependencyResolver:
+    """
+    与目标语言无关的依赖解析器。
+
+    对所有配置表的字段类型只做一次依赖遍历，得出每张表需要额外生成的自定义类型（类、结构体或枚举）。
+    同一次运行中的各语言生成器共享同一个解析器，只负责渲染，无需各自重复遍历依赖图。
+    """
+    def __init__(self, type_system: 'TypeSystem', tables: list['ConfigTable']):
+        """
+        Args:
+            type_system: 已加载所有类型定义的 TypeSystem 实例。
+            tables: 本次要生成代码的全部配置表，按生成顺序排列。
+        """
+        self.classes: list[str] = [] # 所有需要生成的依赖类型名，按首次出现的顺序排列
+        self.table_dependencies: dict[str, list[str]] = {} # 表名 -> 该表首次引入的依赖类型名（深度优先先序）
+        self._type_system = type_system
+        visited: set[str] = set()
+        for table in tables:
+            deps: list[str] = []
+            for row in table.rows:
+                self._walk(row.type_syntax, visited, deps)
+            self.table_dependencies[table.base_name] = deps
+            self.classes.extend(deps)
+
+    def dependencies_of(self, table: 'ConfigTable') -> list[str]:
+        """返回需要随该表一起生成的依赖类型名。已由排在前面的表引入的类型不会重复出现。"""
+        return self.table_dependencies.get(table.base_name, [])
+
+    def _walk(self, type_syntax_str: str, visited: set[str], deps: list[str]):
+        """递归地收集给定类型及其所有子类型中需要生成代码的自定义类型。"""
+        type_str, _ = parse_unified_syntax(type_syntax_str)
+        coll, inner = parse_type_string(type_str)
+        if coll:
+            self._walk(inner, visited, deps)
+            return
+        if inner in PRIMITIVE_TYPE_NAMES or inner in visited:
+            return
+        visited.add(inner)
+        type_def = self._type_system.try_get_type(inner)
+        if type_def is None:
+            return
+        # 只有指定了目标路径的类或枚举才会生成代码，其字段类型也才需要继续遍历
+        if not type_def.get("TargetType"):
+            return
+        if not ("FieldSequence" in type_def or type_def.get("TargetTypeAsEnum")):
+            return
+        deps.append(inner)
+        for field_type_str in _field_type_syntaxes(type_def):
+            self._walk(field_type_str, visited, deps)
+
+# 写出生成文件时使用的 os.open 标志。Windows 上须加 O_BINARY，否则 C 运行库会再次转换换行符
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+# 并行渲染时，每个工作进程通过 initializer 接收一次的生成器构造参数
+_worker_args: tuple | None = None
+
+def _init_render_worker(generator_cls: type, type_system: 'TypeSystem', temp_dir: str, target_config: dict,
+                        dependency_resolver: DependencyResolver):
+    """工作进程初始化函数：保存构造生成器所需的只读参数，避免为每个任务重复传输类型系统。"""
+    global _worker_args
+    _worker_args = (generator_cls, type_system, temp_dir, target_config, dependency_resolver)
+
+def _render_tables_worker(tables: list['ConfigTable']) -> tuple[list[tuple[str, str]], set[str]]:
+    """
+    在工作进程中为一组配置表渲染代码。
+
+    Returns:
+        (待写入的 (文件路径, 内容) 列表, 已生成的文件名集合)。文件由主进程统一写出。
+        惰性的模板输出无法跨进程传递，在此渲染为完整的字符串。
+    """
+    generator_cls, type_system, temp_dir, target_config, dependency_resolver = _worker_args
+    generator = generator_cls(type_system, temp_dir, target_config, dependency_resolver)
+    for table in tables:
+        generator._generate_table(table)
+    writes = [
+        (filepath, content if isinstance(content, str) else "".join(content))
+        for filepath, content in generator._pending_writes
+    ]
+    return writes, generator.generated_files
+
 class BaseCodeGenerator(ABC):
     """
     所有语言代码生成器的抽象基类。
@@ -23,7 +162,8 @@ class BaseCodeGenerator(ABC):
     这个类定义了一个标准的接口，任何新的语言生成器都必须实现它。
     这确保了主执行脚本 (`run.py`) 可以用同样的方式调用任何语言的生成器。
     """
-    def __init__(self, type_system: 'TypeSystem', temp_dir: str, target_config: dict):
+    def __init__(self, type_system: 'TypeSystem', temp_dir: str, target_config: dict,
+                 dependency_resolver: DependencyResolver | None = None):
         """
         初始化生成器基类。
 
@@ -31,11 +171,247 @@ class BaseCodeGenerator(ABC):
             type_system: 已加载所有类型定义的 TypeSystem 实例。
             temp_dir: 用于存放生成文件的临时目录路径。
             target_config: 在 config.toml 中为当前目标语言定义的配置对象。
+            dependency_resolver: 各语言生成器共享的依赖解析结果。未提供时，在生成时为传入的表单独解析。
         """
         self.type_system = type_system
+        self.dependency_resolver = dependency_resolver
         self.temp_dir = temp_dir
         self.target_config = target_config
+        self._output_root = os.path.join(temp_dir, target_config['output_dir']) # 当前目标语言的输出根目录
         self.generated_files = set() # 用于防止重复生成同一个文件
+        self._templates: dict[str, Template] = {} # 已加载的模板，按模板文件名缓存
+        self._pending_writes: list[tuple[str, str | Iterator[str]]] = [] # 待写入的 (文件路径, 内容)，在生成结束时统一写出
+        self._type_meta: dict[str, SimpleNamespace] = {} # 按类型名缓存的派生信息，见 `_get_type_meta`
+        self._ensured_dirs: set[str] = set() # 已确认存在的输出目录
+
+        # 语言无关的缓存在使用同一 TypeSystem 的所有生成器之间共享
+        shared = _SHARED_CACHES.get(type_system)
+        if shared is None:
+            shared = _SHARED_CACHES[type_system] = SimpleNamespace(type_cache={}, type_infos={}, parsed={})
+        self._type_cache: dict[str, dict | None] = shared.type_cache # 已解析的类型定义；未定义的类型缓存为 None
+        self._type_infos: dict[str, TypeInfo] = shared.type_infos # 按完整类型语法缓存的解析结果，见 `_analyze_type`
+        self._parsed: dict[str, tuple[str, str | None, str]] = shared.parsed # 按完整类型语法缓存的语法拆分结果，见 `_parse`
+
+    def _create_jinja_env(self, trim_blocks: bool, lstrip_blocks: bool) -> Environment:
+        """
+        获取当前目标模板目录对应的 Jinja2 环境。
+
+        同一进程内，模板目录与选项相同的环境只构建一次，其内部的模板编译缓存也随之共享。
+        模板在一次生成过程中不会改变，因此关闭 auto_reload 以省去每次查找时的文件状态检查。
+        若目标配置了 `jinja_bytecode_cache_dir`，编译后的模板字节码会缓存到该目录，供后续运行复用。
+        若目标配置了 `compiled_templates` 且该预编译模板包不旧于模板源文件，则通过 ModuleLoader
+        直接加载预编译的模板模块，完全跳过模板解析；否则回退到从模板目录加载。
+        """
+        templates_dir = self.target_config["templates_dir"]
+        bytecode_cache_dir = self.target_config.get("jinja_bytecode_cache_dir") or None
+        compiled_pack = self.target_config.get("compiled_templates") or None
+        if compiled_pack and not _is_compiled_pack_fresh(compiled_pack, templates_dir):
+            compiled_pack = None
+        key = (templates_dir, trim_blocks, lstrip_blocks, bytecode_cache_dir, compiled_pack)
+        env = _ENV_CACHE.get(key)
+        if env is None:
+            bytecode_cache = None
+            if bytecode_cache_dir and not compiled_pack:
+                os.makedirs(bytecode_cache_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(directory=bytecode_cache_dir, pattern='%s.cache')
+            env = Environment(
+                loader=ModuleLoader(compiled_pack) if compiled_pack else FileSystemLoader(templates_dir),
+                trim_blocks=trim_blocks,
+                lstrip_blocks=lstrip_blocks,
+                auto_reload=False,
+                cache_size=400,
+                bytecode_cache=bytecode_cache
+            )
+            env.filters['pascal_case'] = camelize
+            env.filters['camel_case'] = camel_case
+            _ENV_CACHE[key] = env
+        return env
+
+    def compile_templates(self) -> str:
+        """
+        将当前目标的全部模板预编译为 Python 模块，并打包到 `compiled_templates` 指定的 zip 文件中。
+
+        编译使用与生成时相同的环境选项（trim_blocks 等会被固化到编译结果中），
+        但始终从模板目录读取源文件，因此可在已有旧模板包时重新编译。
+
+        Returns:
+            生成的模板包路径。
+        """
+        pack_path = self.target_config["compiled_templates"]
+        os.makedirs(os.path.dirname(pack_path) or ".", exist_ok=True)
+        env = self.jinja_env.overlay(loader=FileSystemLoader(self.target_config["templates_dir"]), bytecode_cache=None)
+        env.compile_templates(pack_path, zip='deflated', filter_func=lambda name: name.endswith('.j2'), ignore_errors=False)
+        return pack_path
+
+    def _get_template(self, name: str) -> Template:
+        """按文件名获取模板，每个模板在生成器实例上只查找一次。"""
+        template = self._templates.get(name)
+        if template is None:
+            template = self._templates[name] = self.jinja_env.get_template(name)
+        return template
+
+    def _lookup_type(self, name: str) -> dict | None:
+        """
+        按名称查找类型定义，结果缓存在生成器实例上。
+
+        Returns:
+            类型定义字典；若该类型未定义则返回 None（未定义的结果同样会被缓存）。
+        """
+        try:
+            return self._type_cache[name]
+        except KeyError:
+            t_def = self._type_cache[name] = self.type_system.try_get_type(name)
+            return t_def
+
+    def _require_type(self, name: str) -> dict:
+        """与 `_lookup_type` 相同，但类型未定义时抛出 TypeSystem 给出的 ValueError。"""
+        t_def = self._lookup_type(name)
+        if t_def is None:
+            return self.type_system.get_type(name) # 由 TypeSystem 抛出带有说明的 ValueError
+        return t_def
+
+    def _get_type_meta(self, name: str) -> SimpleNamespace:
+        """
+        获取一个已定义类型的派生信息（类名、子路径、是否枚举等），每个类型只计算一次。
+
+        类型未定义时抛出 ValueError。
+        """
+        meta = self._type_meta.get(name)
+        if meta is None:
+            meta = self._type_meta[name] = self._build_type_meta(name, self._require_type(name))
+        return meta
+
+    def _build_type_meta(self, name: str, type_def: dict) -> SimpleNamespace:
+        """
+        计算类型的派生信息。子类可以扩展此方法，补充特定语言的字段（如文件名、命名空间）。
+        """
+        target_path = type_def.get("TargetType", "")
+        is_enum = type_def.get("TargetTypeAsEnum", False)
+        return SimpleNamespace(
+            type_def=type_def,
+            target_path=target_path,
+            base_name=split_target(type_def.get("TargetType", name))[0],
+            sub_path=split_target(target_path)[1],
+            is_enum=is_enum,
+            is_complex="FieldSequence" in type_def and not is_enum,
+            is_generatable=bool(target_path) and bool("FieldSequence" in type_def or is_enum),
+        )
+
+    def _parse(self, type_syntax_str: str) -> tuple[str, str | None, str]:
+        """
+        拆分类型语法，结果按类型语法字符串缓存。
+
+        Returns:
+            (去掉分隔符部分后的类型字符串, 集合种类或 None, 元素类型或类型名)。
+        """
+        parsed = self._parsed.get(type_syntax_str)
+        if parsed is None:
+            type_str, _ = parse_unified_syntax(type_syntax_str)
+            parsed = self._parsed[type_syntax_str] = (type_str, *parse_type_string(type_str))
+        return parsed
+
+    def _analyze_type(self, type_syntax_str: str) -> TypeInfo:
+        """
+        一次性解析类型语法（包括集合的各层元素类型），结果按类型语法字符串缓存。
+        未定义的自定义类型不会抛出异常，其 is_complex 与 is_enum 均为 False。
+        """
+        info = self._type_infos.get(type_syntax_str)
+        if info is not None:
+            return info
+
+        type_str, coll, inner = self._parse(type_syntax_str)
+        if coll:
+            info = TypeInfo(type_str, coll, self._analyze_type(inner))
+        else:
+            info = TypeInfo(type_str, None, None, is_primitive=type_str in PRIMITIVE_TYPE_NAMES)
+            t_def = self._lookup_type(type_str)
+            if t_def is not None:
+                info.is_enum = t_def.get("TargetTypeAsEnum", False)
+                info.is_complex = "FieldSequence" in t_def and not info.is_enum
+        self._type_infos[type_syntax_str] = info
+        return info
+
+    def _generate_table(self, table: 'ConfigTable'):
+        """为单个配置表生成代码，按表的类型分派到 `generate_flat_singleton` 或 `generate_standard_table`。"""
+        if table.is_flat_table:
+            self.generate_flat_singleton(table)
+        else:
+            self.generate_standard_table(table)
+
+    def _resolve_dependencies(self, tables: list['ConfigTable']):
+        """确保依赖解析结果可用。未从外部传入共享的解析器时，为这批表解析一次。"""
+        if self.dependency_resolver is None:
+            self.dependency_resolver = DependencyResolver(self.type_system, tables)
+
+    def _generate_tables(self, tables: list['ConfigTable']):
+        """
+        为所有配置表渲染代码，渲染结果登记到待写列表中。
+
+        表的数量较多时，按顺序切分成若干组，交给进程池并行渲染。各组结果按表的顺序合并：
+        同名的共享类型文件（记录在 `generated_files` 中的）以排在前面的表生成的版本为准，
+        与顺序生成时的结果一致。
+        """
+        self._resolve_dependencies(tables)
+        workers = min(os.cpu_count() or 1, len(tables))
+        if len(tables) < PARALLEL_MIN_TABLES or workers < 2:
+            for table in tables:
+                self._generate_table(table)
+            return
+
+        chunk_size = -(-len(tables) // workers)
+        chunks = [tables[i:i + chunk_size] for i in range(0, len(tables), chunk_size)]
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=len(chunks),
+            initializer=_init_render_worker,
+            initargs=(type(self), self.type_system, self.temp_dir, self.target_config, self.dependency_resolver)
+        ) as executor:
+            for writes, generated in executor.map(_render_tables_worker, chunks):
+                for filepath, content in writes:
+                    filename = os.path.basename(filepath)
+                    if filename in generated and filename in self.generated_files:
+                        continue
+                    self._pending_writes.append((filepath, content))
+                self.generated_files |= generated
+
+    def _queue_write(self, filepath: str, content: str | Iterator[str]):
+        """
+        登记一个待写入的生成文件。实际写入推迟到 `_flush_writes` 中统一进行。
+
+        content 可以是完整的字符串，也可以是 `Template.generate` 返回的惰性输出。
+        后者在写出时才逐块渲染并直接写入文件，不在内存中拼出完整内容。
+        """
+        self._pending_writes.append((filepath, content))
+
+    def _ensure_dir(self, path: str):
+        """确保目录存在。每个目录只创建（检查）一次。"""
+        if path in self._ensured_dirs:
+            return
+        os.makedirs(path, exist_ok=True)
+        self._ensured_dirs.add(path)
+
+    def _flush_writes(self):
+        """将所有已登记的生成文件一次性写入磁盘（按需创建所在目录），并清空待写列表。"""
+        # 直接通过文件描述符写入一次性编码好的内容，绕过 Python 的文本与缓冲 I/O 层。
+        # 换行符仍按平台转换，与文本模式写入的结果保持一致
+        translate_newlines = os.linesep != '\n'
+        for filepath, content in self._pending_writes:
+            self._ensure_dir(os.path.dirname(filepath))
+            fd = os.open(filepath, _WRITE_FLAGS, 0o666)
+            if not isinstance(content, str):
+                # 模板输出边渲染边写入，缓冲、编码与换行符转换交给文本 I/O 层
+                with open(fd, 'w', encoding='utf-8') as f:
+                    f.writelines(content)
+                continue
+            if translate_newlines:
+                content = content.replace('\n', os.linesep)
+            data = memoryview(content.encode('utf-8'))
+            try:
+                # os.write 可能只写入部分数据（大文件时常见），循环直到全部写完
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+        self._pending_writes.clear()
 
     @abstractmethod
     def generate_all(self, tables: list['ConfigTable']):
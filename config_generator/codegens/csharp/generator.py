@@ -9,151 +9,154 @@
 
 # /config_generator/codegens/csharp/generator.py
 import os
-from jinja2 import Environment, FileSystemLoader
-import inflection
+import sys
+from types import SimpleNamespace
 
 # 动态导入，避免循环依赖并提供类型提示
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from ...models import ConfigTable
     from ...readers import TypeSystem
+    from ..base_generator import DependencyResolver
 
-from ..base_generator import BaseCodeGenerator
-from ...writers import parse_type_string, parse_unified_syntax
+from ..base_generator import BaseCodeGenerator, TypeInfo, camelize
+from ...models import PRIMITIVE_TYPE_NAMES
+
+# 基元类型到自定义 DataReader 读取方法的映射；枚举与其他类型均按 Int32 读取
+_PRIMITIVE_READ_METHODS = {
+    "int": "ReadInt32()", "long": "ReadInt64()", "string": "ReadString()",
+    "bool": "ReadBoolean()", "float": "ReadSingle()"
+}
+
+# 基元类型的读取信息是固定的，预先构建并在所有字段间共享（模板只读不改）
+_PRIMITIVE_READ_INFOS = {
+    t: {"is_collection": False, "type": t, "is_complex": False, "is_enum": False, "read_method": m}
+    for t, m in _PRIMITIVE_READ_METHODS.items()
+}
 
 class CodeGenerator(BaseCodeGenerator):
     """C# 代码生成器。"""
-    def __init__(self, type_system: 'TypeSystem', temp_dir: str, target_config: dict):
-        super().__init__(type_system, temp_dir, target_config)
-        # 初始化 Jinja2 环境，指向 C# 的模板目录
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(self.target_config["templates_dir"]),
-            trim_blocks=False,
-            lstrip_blocks=False
-        )
-        self.jinja_env.filters['pascal_case'] = inflection.camelize
-        self.jinja_env.filters['camel_case'] = lambda s: inflection.camelize(s, uppercase_first_letter=False)
+    def __init__(self, type_system: 'TypeSystem', temp_dir: str, target_config: dict,
+                 dependency_resolver: 'DependencyResolver | None' = None):
+        super().__init__(type_system, temp_dir, target_config, dependency_resolver)
+        # 获取共享的 Jinja2 环境，指向 C# 的模板目录
+        self.jinja_env = self._create_jinja_env(trim_blocks=False, lstrip_blocks=False)
+        self._read_infos: dict[str, dict] = {} # 按类型字符串缓存的读取信息，模板只读不改，可在字段间共享
 
     def generate_all(self, tables: list['ConfigTable']):
         """为所有配置表生成 C# 代码的主入口。"""
         # 首先确保 DataReader 辅助类被生成
         self._generate_datareader()
 
-        for table in tables:
-            if table.is_flat_table:
-                self.generate_flat_singleton(table)
-            else:
-                self.generate_standard_table(table)
+        self._generate_tables(tables)
+
+        # 所有文件渲染完毕后统一写出
+        self._flush_writes()
     
     def _get_csharp_type(self, type_syntax_str: str) -> str:
-        """递归地将类型字符串转换为 C# 类型声明。"""
-        type_str, _ = parse_unified_syntax(type_syntax_str)
-        coll, inner = parse_type_string(type_str)
-        if coll == "list":
-            return f"System.Collections.Generic.List<{self._get_csharp_type(inner)}>"
-        if coll == "array":
-            return f"{self._get_csharp_type(inner)}[]"
-        if coll == "set":
-            return f"System.Collections.Generic.HashSet<{self._get_csharp_type(inner)}>"
+        """将类型字符串转换为 C# 类型声明。"""
+        if type_syntax_str in PRIMITIVE_TYPE_NAMES:
+            return type_syntax_str
+        return self._csharp_type_of(self._analyze_type(type_syntax_str))
+
+    def _csharp_type_of(self, info: TypeInfo) -> str:
+        """递归地将已解析的类型信息转换为 C# 类型声明。"""
+        if info.collection == "list":
+            return f"System.Collections.Generic.List<{self._csharp_type_of(info.inner)}>"
+        if info.collection == "array":
+            return f"{self._csharp_type_of(info.inner)}[]"
+        if info.collection == "set":
+            return f"System.Collections.Generic.HashSet<{self._csharp_type_of(info.inner)}>"
         
-        type_name = inner
-        if type_name in ['long', 'int', 'string', 'bool', 'float']:
-            return type_name
+        if info.is_primitive:
+            return info.type_str
             
-        return os.path.basename(self.type_system.get_type(type_name).get("TargetType", type_name))
+        return self._get_type_meta(info.type_str).base_name
+
+    def _build_type_meta(self, name: str, type_def: dict) -> SimpleNamespace:
+        """在通用派生信息之上补充 C# 的命名空间、文件名与输出目录。"""
+        meta = super()._build_type_meta(name, type_def)
+        meta.namespace = self.target_config['namespace']
+        if meta.sub_path:
+            meta.namespace += "." + meta.sub_path.replace('/', '.')
+        meta.filename = sys.intern(f"{meta.base_name}.cs")
+        meta.output_dir = os.path.join(self._output_root, meta.sub_path)
+        return meta
 
     def _get_read_info(self, type_syntax_str: str) -> dict:
-        """为模板准备一个包含完整读取信息的字典，支持递归。"""
-        type_str, _ = parse_unified_syntax(type_syntax_str)
-        coll, inner = parse_type_string(type_str)
-        if coll:
-            return {
+        """为模板准备一个包含完整读取信息的字典。"""
+        read_info = _PRIMITIVE_READ_INFOS.get(type_syntax_str)
+        if read_info is not None:
+            return read_info
+        return self._read_info_of(self._analyze_type(type_syntax_str))
+
+    def _read_info_of(self, info: TypeInfo) -> dict:
+        """根据已解析的类型信息递归地构建读取信息字典，每种类型只构建一次。"""
+        if info.is_primitive:
+            return _PRIMITIVE_READ_INFOS[info.type_str]
+        read_info = self._read_infos.get(info.type_str)
+        if read_info is not None:
+            return read_info
+
+        if info.collection:
+            read_info = {
                 "is_collection": True,
-                "collection_type": coll,
-                "type": self._get_csharp_type(type_str),
-                "list_item": self._get_read_info(inner)
+                "collection_type": info.collection,
+                "type": self._csharp_type_of(info),
+                "list_item": self._read_info_of(info.inner)
             }
-        
-        is_complex, is_enum = False, False
-        try:
-            t_def = self.type_system.get_type(type_str)
-            is_complex = "FieldSequence" in t_def and not t_def.get("TargetTypeAsEnum")
-            is_enum = t_def.get("TargetTypeAsEnum", False)
-        except ValueError:
-            pass
+        else:
+            # 映射到我们自定义的 DataReader 的方法
+            read_method = _PRIMITIVE_READ_METHODS.get(info.type_str, "ReadInt32()")
+            read_info = {
+                "is_collection": False, "type": self._csharp_type_of(info),
+                "is_complex": info.is_complex, "is_enum": info.is_enum, "read_method": read_method
+            }
+        self._read_infos[info.type_str] = read_info
+        return read_info
 
-        # 映射到我们自定义的 DataReader 的方法
-        read_method = "ReadInt32()"
-        if type_str == "long": read_method = "ReadInt64()"
-        elif type_str == "string": read_method = "ReadString()"
-        elif type_str == "bool": read_method = "ReadBoolean()"
-        elif type_str == "float": read_method = "ReadSingle()"
-        
+    def _build_field_entry(self, name: str, type_syntax_str: str, comment: str) -> dict:
+        """为模板构建单个字段的完整描述，类型只解析一次。"""
+        info = self._analyze_type(type_syntax_str)
         return {
-            "is_collection": False, "type": self._get_csharp_type(type_str),
-            "is_complex": is_complex, "is_enum": is_enum, "read_method": read_method
+            "name": camelize(name),
+            "type": self._csharp_type_of(info),
+            "comment": comment,
+            "read_info": self._read_info_of(info),
+            "is_collection": info.collection is not None,
+            "is_primitive": info.is_primitive
         }
 
     def _collect_imports_recursive(self, type_syntax_str: str, current_namespace: str, imports: set):
         """递归地为一个类型收集所有必要的 `using` 命名空间。"""
-        type_str, _ = parse_unified_syntax(type_syntax_str)
-        coll, inner = parse_type_string(type_str)
+        _, coll, inner = self._parse(type_syntax_str)
         if coll:
             self._collect_imports_recursive(inner, current_namespace, imports)
             return
-        if inner in ["int", "long", "string", "bool", "float"]:
+        if inner in PRIMITIVE_TYPE_NAMES:
             return
-        try:
-            dep_def = self.type_system.get_type(inner)
-            dep_target_path = dep_def.get("TargetType")
-            if "FieldSequence" in dep_def or dep_def.get("TargetTypeAsEnum"):
-                dep_sub_path = os.path.dirname(dep_target_path)
-                if dep_sub_path:
-                    dep_namespace = self.target_config['namespace'] + "." + dep_sub_path.replace('/', '.')
-                    if dep_namespace != current_namespace:
-                        imports.add(dep_namespace)
-        except ValueError:
-            pass
-
-    def _recursive_dependency_gen(self, type_syntax_str: str):
-        """递归地为给定类型及其所有子类型生成代码。"""
-        type_str, _ = parse_unified_syntax(type_syntax_str)
-        coll, inner = parse_type_string(type_str)
-        if coll:
-            self._recursive_dependency_gen(inner)
-            return
-        if inner in ["int", "long", "string", "bool", "float"]:
+        if self._lookup_type(inner) is None:
             return
-        try:
-            dep_type_def = self.type_system.get_type(inner)
-            if "TargetType" in dep_type_def:
-                if self._generate_class_or_enum(dep_type_def):
-                    for field_def in dep_type_def.get("FieldSequence", []):
-                        self._recursive_dependency_gen(field_def["Type"])
-        except ValueError:
-            pass
+        meta = self._get_type_meta(inner)
+        if meta.is_generatable and meta.sub_path and meta.namespace != current_namespace:
+            imports.add(meta.namespace)
 
-    def _generate_class_or_enum(self, type_def: dict, struct_comment: str = "") -> bool:
+    def _generate_class_or_enum(self, type_name: str, struct_comment: str = "") -> bool:
         """
         生成单个类或枚举文件，如果尚未生成过。
         """
-        target_path = type_def.get("TargetType", "")
-        is_generatable = "FieldSequence" in type_def or type_def.get("TargetTypeAsEnum")
-        if not target_path or not is_generatable:
+        meta = self._get_type_meta(type_name)
+        if not meta.is_generatable:
             return False
 
-        class_name = os.path.basename(target_path)
-        filename = f"{class_name}.cs"
+        type_def = meta.type_def
+        class_name = meta.base_name
+        filename = meta.filename
         if filename in self.generated_files:
             return False
             
-        namespace = self.target_config['namespace']
-        sub_path_str = os.path.dirname(target_path)
-        if sub_path_str:
-            namespace += "." + sub_path_str.replace('/', '.')
-        
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'], sub_path_str)
-        os.makedirs(output_dir, exist_ok=True)
+        namespace = meta.namespace
+        output_dir = meta.output_dir
         
         comment_purpose = struct_comment or type_def.get("Comment", f"Represents a {class_name}.")
         
@@ -163,31 +166,26 @@ class CodeGenerator(BaseCodeGenerator):
                 self._collect_imports_recursive(field_def["Type"], namespace, imports)
         
         if type_def.get("TargetTypeAsEnum"):
-            template = self.jinja_env.get_template("csharp_enum.cs.j2")
-            content = template.render(
+            template = self._get_template("csharp_enum.cs.j2")
+            content = template.generate(
                 namespace=namespace, enum_name=class_name,
                 comment_purpose=comment_purpose,
-                members=[{"name": inflection.camelize(k), "value": v} for k, v in type_def.get("EnumMembers", {}).items()]
+                members=[{"name": camelize(k), "value": v} for k, v in type_def.get("EnumMembers", {}).items()]
             )
         else: # 是一个类
-            template = self.jinja_env.get_template("csharp_class.cs.j2")
-            fields_data = []
-            for field_def in type_def.get("FieldSequence", []):
-                fields_data.append({
-                    "name": inflection.camelize(field_def["Field"]),
-                    "type": self._get_csharp_type(field_def["Type"]),
-                    "comment": field_def.get("Comment", ""),
-                    "read_info": self._get_read_info(field_def["Type"])
-                })
-            content = template.render(
+            template = self._get_template("csharp_class.cs.j2")
+            fields_data = [
+                self._build_field_entry(field_def["Field"], field_def["Type"], field_def.get("Comment", ""))
+                for field_def in type_def.get("FieldSequence", [])
+            ]
+            content = template.generate(
                 namespace=namespace, class_name=class_name,
                 struct_comment=comment_purpose, fields=fields_data,
                 imports=sorted(list(imports))
             )
         
         filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        self._queue_write(filepath, content)
             
         self.generated_files.add(filename)
         return True
@@ -196,67 +194,47 @@ class CodeGenerator(BaseCodeGenerator):
         """生成 DataReader 辅助类。"""
         filename = "DataReader.cs"
         if filename in self.generated_files: return
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'])
-        os.makedirs(output_dir, exist_ok=True)
-        template = self.jinja_env.get_template("csharp_datareader.cs.j2")
-        content = template.render(namespace=self.target_config['namespace'])
-        filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f: f.write(content)
+        template = self._get_template("csharp_datareader.cs.j2")
+        content = template.generate(namespace=self.target_config['namespace'])
+        filepath = os.path.join(self._output_root, filename)
+        self._queue_write(filepath, content)
         self.generated_files.add(filename)
 
     def generate_standard_table(self, table: 'ConfigTable'):
         """为标准表格生成主类、依赖和管理器。"""
-        main_type_def = self.type_system.get_type(table.target_type_name)
-        
-        for row in table.rows:
-            self._recursive_dependency_gen(row.type_syntax)
+        for type_name in self.dependency_resolver.dependencies_of(table):
+            self._generate_class_or_enum(type_name)
             
-        self._generate_class_or_enum(main_type_def, struct_comment=table.table_comment)
+        self._generate_class_or_enum(table.target_type_name, struct_comment=table.table_comment)
         
         manager_name = f"{table.base_name}ConfigManager"
-        template = self.jinja_env.get_template("csharp_manager.cs.j2")
-        content = template.render(
+        template = self._get_template("csharp_manager.cs.j2")
+        content = template.generate(
             namespace=self.target_config['namespace'], manager_name=manager_name,
             data_class_name=table.target_type_name,
-            primary_key_fields=[inflection.camelize(f) for f in table.primary_key_fields]
+            primary_key_fields=[camelize(f) for f in table.primary_key_fields]
         )
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'])
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, f"{manager_name}.cs")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        filepath = os.path.join(self._output_root, f"{manager_name}.cs")
+        self._queue_write(filepath, content)
 
     def generate_flat_singleton(self, table: 'ConfigTable'):
         """为平铺式表格生成单例类及其依赖。"""
         class_name = table.target_type_name
         
-        for row in table.rows:
-            self._recursive_dependency_gen(row.type_syntax)
+        for type_name in self.dependency_resolver.dependencies_of(table):
+            self._generate_class_or_enum(type_name)
         
         imports = set()
         for row in table.rows:
             self._collect_imports_recursive(row.type_syntax, self.target_config['namespace'], imports)
 
-        fields_data = [
-            {
-                "name": inflection.camelize(row.key),
-                "type": self._get_csharp_type(row.type_syntax),
-                "comment": row.comment,
-                "read_info": self._get_read_info(row.type_syntax),
-                "is_collection": parse_type_string(parse_unified_syntax(row.type_syntax)[0])[0] is not None,
-                "is_primitive": parse_unified_syntax(row.type_syntax)[0] in ["int","long","string","bool","float"]
-            } 
-            for row in table.rows
-        ]
+        fields_data = [self._build_field_entry(row.key, row.type_syntax, row.comment) for row in table.rows]
         
-        template = self.jinja_env.get_template("csharp_flat_singleton.cs.j2")
-        content = template.render(
+        template = self._get_template("csharp_flat_singleton.cs.j2")
+        content = template.generate(
             namespace=self.target_config['namespace'], class_name=class_name,
             struct_comment=table.table_comment, excel_file_name=table.excel_file_name,
             fields=fields_data, imports=sorted(list(imports))
         )
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'])
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, f"{class_name}.cs")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        filepath = os.path.join(self._output_root, f"{class_name}.cs")
+        self._queue_write(filepath, content)
@@ -9,29 +9,38 @@
 
 # /config_generator/codegens/javascript/generator.py
 import os
-from jinja2 import Environment, FileSystemLoader
-import inflection
+import sys
+import functools
+from collections import namedtuple
+from types import SimpleNamespace
 
 # 动态导入，避免循环依赖并提供类型提示
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from ...models import ConfigTable
     from ...readers import TypeSystem
+    from ..base_generator import DependencyResolver
 
-from ..base_generator import BaseCodeGenerator
+from ..base_generator import BaseCodeGenerator, camelize, underscore
 from ...writers import parse_type_string # 复用解析器
 
+# 基元类型到 JSDoc 类型以及 DataView 读取方法的映射
+_JSDOC_PRIMITIVE_TYPES = {"int": "number", "long": "number", "float": "number", "string": "string", "bool": "boolean"}
+_PRIMITIVE_READ_METHODS = {"long": "getBigInt64", "string": "readString", "bool": "getBoolean", "float": "getFloat32"}
+
+# 传给模板的单个字段描述。模板通过属性访问（如 field.name）读取，与字典的写法相同
+FieldRec = namedtuple('FieldRec', 'name type comment read_info')
+
 class CodeGenerator(BaseCodeGenerator):
     """JavaScript 代码生成器 (使用 JSDoc)。"""
-    def __init__(self, type_system: 'TypeSystem', temp_dir: str, target_config: dict):
-        super().__init__(type_system, temp_dir, target_config)
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(self.target_config["templates_dir"]),
-            trim_blocks=True, lstrip_blocks=True
-        )
-        # 为模板添加过滤器
-        self.jinja_env.filters['camel_case'] = lambda s: inflection.camelize(s, uppercase_first_letter=False)
-        self.jinja_env.filters['pascal_case'] = inflection.camelize
+    def __init__(self, type_system: 'TypeSystem', temp_dir: str, target_config: dict,
+                 dependency_resolver: 'DependencyResolver | None' = None):
+        super().__init__(type_system, temp_dir, target_config, dependency_resolver)
+        self.jinja_env = self._create_jinja_env(trim_blocks=True, lstrip_blocks=True)
+        # 类型转换的结果只取决于类型字符串，按生成器实例缓存。
+        # 缓存的读取信息字典会在多个字段间共享，调用方不得修改
+        self._get_jsdoc_type = functools.lru_cache(maxsize=None)(self._get_jsdoc_type)
+        self._get_read_info = functools.lru_cache(maxsize=None)(self._get_read_info)
 
     def generate_all(self, tables: list['ConfigTable']):
         """为所有配置表生成 JavaScript 代码的主入口。"""
@@ -39,22 +48,21 @@ class CodeGenerator(BaseCodeGenerator):
         index_content = []
         for table in tables:
             if table.is_flat_table:
-                class_name = inflection.camelize(table.target_type_name)
-                file_name = inflection.underscore(class_name)
-                index_content.append(f'export * from "./{file_name}.js";')
-                self.generate_flat_singleton(table)
+                class_name = camelize(table.target_type_name)
+                file_name = underscore(class_name)
             else:
-                manager_name = f"{inflection.camelize(table.base_name)}ConfigManager"
-                file_name = inflection.underscore(manager_name)
-                index_content.append(f'export * from "./{file_name}.js";')
-                self.generate_standard_table(table)
+                manager_name = f"{camelize(table.base_name)}ConfigManager"
+                file_name = underscore(manager_name)
+            index_content.append(f'export * from "./{file_name}.js";')
+
+        self._generate_tables(tables)
         
         # 写入 index.js 文件
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'])
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, "index.js")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write("\n".join(index_content))
+        filepath = os.path.join(self._output_root, "index.js")
+        self._queue_write(filepath, "\n".join(index_content))
+
+        # 所有文件渲染完毕后统一写出
+        self._flush_writes()
 
     def _get_jsdoc_type(self, type_str: str) -> str:
         """递归地将类型字符串转换为 JSDoc 类型声明。"""
@@ -65,12 +73,11 @@ class CodeGenerator(BaseCodeGenerator):
             return f"Set<{self._get_jsdoc_type(inner)}>"
         
         type_name = inner
-        if type_name in ['int', 'long', 'float']: return 'number'
-        if type_name == 'string': return 'string'
-        if type_name == 'bool': return 'boolean'
+        jsdoc_type = _JSDOC_PRIMITIVE_TYPES.get(type_name)
+        if jsdoc_type is not None: return jsdoc_type
         
         # 对于自定义类型，返回其类名 (PascalCase)
-        return inflection.camelize(os.path.basename(self.type_system.get_type(type_name).get("TargetType", type_name)))
+        return self._get_type_meta(type_name).class_name
 
     def _get_read_info(self, type_str: str) -> dict:
         """为模板准备一个包含完整读取信息的字典。"""
@@ -79,119 +86,103 @@ class CodeGenerator(BaseCodeGenerator):
             return {"is_collection": True, "type": self._get_jsdoc_type(type_str), "list_item": self._get_read_info(inner)}
         
         is_complex, is_enum = False, False
-        try:
-            t_def = self.type_system.get_type(type_str)
-            is_complex = "/" in t_def.get("TargetType", "") and not t_def.get("TargetTypeAsEnum")
-            is_enum = t_def.get("TargetTypeAsEnum", False)
-        except ValueError: pass
+        if self._lookup_type(type_str) is not None:
+            meta = self._get_type_meta(type_str)
+            is_complex, is_enum = meta.is_class, meta.is_enum
 
         # 映射到 DataView 的方法
-        read_method = "getInt32"
-        if type_str == "long": read_method = "getBigInt64"
-        elif type_str == "string": read_method = "readString" # 这是个自定义的辅助函数
-        elif type_str == "bool": read_method = "getBoolean"
-        elif type_str == "float": read_method = "getFloat32"
+        # readString 是个自定义的辅助函数
+        read_method = _PRIMITIVE_READ_METHODS.get(type_str, "getInt32")
 
         return {"is_collection": False, "type": self._get_jsdoc_type(type_str), "is_complex": is_complex, "is_enum": is_enum, "read_method": read_method}
 
-    def _recursive_dependency_gen(self, type_str: str):
-        """递归地为给定类型及其所有子类型生成代码。"""
-        coll, inner = parse_type_string(type_str)
-        if coll: self._recursive_dependency_gen(inner); return
-        if inner in ["int", "long", "string", "bool", "float"]: return
-        
-        try:
-            dep_type_def = self.type_system.get_type(inner)
-            if "TargetType" in dep_type_def and "/" in dep_type_def["TargetType"]:
-                if self._generate_class_or_enum(dep_type_def):
-                    for field_type_str in dep_type_def.get("FieldTypes", {}).values():
-                        self._recursive_dependency_gen(field_type_str)
-        except ValueError: pass
-
-    def _generate_class_or_enum(self, type_def: dict, comments: dict = None) -> bool:
+    def _build_field_entry(self, name: str, type_str: str, comment: str) -> FieldRec:
+        """为模板构建单个字段的完整描述。"""
+        return FieldRec(
+            name=camelize(name, False),
+            type=self._get_jsdoc_type(type_str),
+            comment=comment,
+            read_info=self._get_read_info(type_str)
+        )
+
+    def _build_type_meta(self, name: str, type_def: dict) -> SimpleNamespace:
+        """在通用派生信息之上补充 JavaScript 的类名、文件名与输出目录。只有目标路径带子目录的类型才会生成文件。"""
+        meta = super()._build_type_meta(name, type_def)
+        meta.class_name = camelize(meta.base_name)
+        meta.filename = sys.intern(f"{underscore(meta.class_name)}.js")
+        meta.output_dir = os.path.join(self._output_root, meta.sub_path.lower())
+        meta.has_module = "/" in meta.target_path
+        meta.is_class = meta.has_module and not meta.is_enum
+        return meta
+
+    def _generate_class_or_enum(self, type_name: str, comments: dict = None) -> bool:
         """生成单个 class 或 enum 对象，如果尚未生成过。"""
-        target_path = type_def.get("TargetType", "")
-        class_name = inflection.camelize(os.path.basename(target_path))
-        filename = f"{inflection.underscore(class_name)}.js"
+        meta = self._get_type_meta(type_name)
+        type_def = meta.type_def
+        class_name = meta.class_name
+        filename = meta.filename
         
-        if not target_path or "/" not in target_path or filename in self.generated_files: return False
+        if not meta.has_module or filename in self.generated_files: return False
             
-        sub_path_str = os.path.dirname(target_path)
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'], sub_path_str.lower())
-        os.makedirs(output_dir, exist_ok=True)
+        output_dir = meta.output_dir
         
-        if type_def.get("TargetTypeAsEnum"):
-            template = self.jinja_env.get_template("js_enum.js.j2")
-            content = template.render(
+        if meta.is_enum:
+            template = self._get_template("js_enum.js.j2")
+            content = template.generate(
                 enum_name=class_name,
-                members=[{"name": inflection.camelize(k), "value": v} for k, v in type_def.get("EnumMembers", {}).items()]
+                members=[{"name": camelize(k), "value": v} for k, v in type_def.get("EnumMembers", {}).items()]
             )
         else: # 是一个 class
-            template = self.jinja_env.get_template("js_class.js.j2")
-            fields_data = []
-            for name in type_def.get("FieldSequence", []):
-                field_type_str = type_def["FieldTypes"][name]
-                fields_data.append({
-                    "name": inflection.camelize(name, False),
-                    "type": self._get_jsdoc_type(field_type_str),
-                    "comment": (comments or {}).get(name, ""),
-                    "read_info": self._get_read_info(field_type_str)
-                })
-            content = template.render(
+            template = self._get_template("js_class.js.j2")
+            comments = comments or {}
+            fields_data = [
+                self._build_field_entry(name, type_def["FieldTypes"][name], comments.get(name, ""))
+                for name in type_def.get("FieldSequence", [])
+            ]
+            content = template.generate(
                 class_name=class_name,
                 fields=fields_data
             )
 
         filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f: f.write(content)
+        self._queue_write(filepath, content)
         self.generated_files.add(filename)
         return True
 
     def generate_standard_table(self, table: 'ConfigTable'):
         """为标准表格生成主 class、依赖和管理器。"""
-        main_type_def = self.type_system.get_type(table.target_type_name)
+        main_type_def = self._require_type(table.target_type_name)
         main_type_def["FieldTypes"] = {row.key: row.type_syntax for row in table.rows}
         main_type_def["FieldSequence"] = [row.key for row in table.rows]
         comments = {row.key: row.comment for row in table.rows}
         
-        for field_type_str in main_type_def["FieldTypes"].values(): self._recursive_dependency_gen(field_type_str)
-        self._generate_class_or_enum(main_type_def, comments)
+        for type_name in self.dependency_resolver.dependencies_of(table): self._generate_class_or_enum(type_name)
+        self._generate_class_or_enum(table.target_type_name, comments)
         
-        manager_name = f"{inflection.camelize(table.base_name)}ConfigManager"
-        template = self.jinja_env.get_template("js_manager.js.j2")
-        content = template.render(
+        manager_name = f"{camelize(table.base_name)}ConfigManager"
+        template = self._get_template("js_manager.js.j2")
+        content = template.generate(
             manager_name=manager_name,
-            data_class_name=inflection.camelize(table.target_type_name),
-            primary_key_fields=[inflection.camelize(f, False) for f in table.primary_key_fields],
+            data_class_name=camelize(table.target_type_name),
+            primary_key_fields=[camelize(f, False) for f in table.primary_key_fields],
             read_info=self._get_read_info(table.target_type_name)
         )
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'])
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, f"{inflection.underscore(manager_name)}.js")
-        with open(filepath, 'w', encoding='utf-8') as f: f.write(content)
+        filepath = os.path.join(self._output_root, f"{underscore(manager_name)}.js")
+        self._queue_write(filepath, content)
 
     def generate_flat_singleton(self, table: 'ConfigTable'):
         """为平铺式表格生成单例对象及其依赖。"""
-        class_name = inflection.camelize(table.target_type_name)
+        class_name = camelize(table.target_type_name)
         
-        for row in table.rows: self._recursive_dependency_gen(row.type_syntax)
+        for type_name in self.dependency_resolver.dependencies_of(table): self._generate_class_or_enum(type_name)
         
-        fields_data = []
-        for row in table.rows:
-            fields_data.append({
-                "name": inflection.camelize(row.key, False),
-                "type": self._get_jsdoc_type(row.type_syntax),
-                "comment": row.comment,
-                "read_info": self._get_read_info(row.type_syntax)
-            })
+        fields_data = [self._build_field_entry(row.key, row.type_syntax, row.comment) for row in table.rows]
         
-        template = self.jinja_env.get_template("js_flat_singleton.js.j2")
-        content = template.render(
+        template = self._get_template("js_flat_singleton.js.j2")
+        content = template.generate(
             class_name=class_name,
             excel_file_name=table.excel_file_name,
             fields=fields_data
         )
-        output_dir = os.path.join(self.temp_dir, self.target_config['output_dir'])
-        os.makedirs(output_dir, exist_ok=True)
-        filepath = os.path.join(output_dir, f"{inflection.underscore(class_name)}.js")
-        with open(filepath, 'w', encoding='utf-8') as f: f.write(content)
+        filepath = os.path.join(self._output_root, f"{underscore(class_name)}.js")
+        self._queue_write(filepath, content)
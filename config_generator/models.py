@@ -11,7 +11,14 @@
 from dataclasses import dataclass, field
 from typing import Any
 
-@dataclass
+# 读取、序列化与代码渲染各阶段共用的并行门槛：表的数量达到该值时才使用多进程，
+# 表较少时（尤其是 Windows 等以 spawn 方式启动子进程的平台），进程启动的开销会超过并行带来的收益
+PARALLEL_MIN_TABLES = 16
+
+# 无需定义即可使用的基元类型，读取、序列化与各目标语言的代码生成共用这一份
+PRIMITIVE_TYPE_NAMES = frozenset({"int", "long", "string", "bool", "float"})
+
+@dataclass(slots=True)
 class ConfigRow:
     """
     表示平铺表中的一行，或标准表中的一个字段定义。
@@ -35,4 +42,4 @@ class ConfigTable:
     table_comment: str = ""             # 用于存储整个表格的注释
     primary_key_fields: list[str] = field(default_factory=list) # 仅标准表使用
     rows: list[ConfigRow] = field(default_factory=list)         # 存放字段定义 (标准表) 或属性定义 (平铺表)
-    data_rows: list[list[Any]] = field(default_factory=list)    # 存放纯数据行 (仅标准表)
+    data_rows: list[tuple[Any, ...]] = field(default_factory=list) # 存放纯数据行，列顺序与 rows 一致 (仅标准表)
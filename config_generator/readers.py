@@ -9,17 +9,34 @@
 
 # /config_generator/readers.py
 import os
+import sys
 import json
+import functools
+import operator
+import concurrent.futures
+from pathlib import Path
+from typing import Iterator
 import openpyxl
 import re
-from .models import ConfigTable, ConfigRow
+from .models import ConfigTable, ConfigRow, PARALLEL_MIN_TABLES, PRIMITIVE_TYPE_NAMES
+
+# orjson 为可选依赖：安装后用它直接解析字节形式的 JSON，速度更快；否则回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 基元类型的隐式定义，由 `TypeSystem.try_get_type` 共享返回，调用方不得修改
+_PRIMITIVE_TYPE_DEFS = {name: {"TargetType": name} for name in PRIMITIVE_TYPE_NAMES}
 
 # 用于解析 list(int) 或 array(Item) 这样的语法
-TYPE_STRING_REGEX = re.compile(r"^(list|set|array)\((.*)\)$")
+TYPE_STRING_REGEX = re.compile(r"(list|set|array)\((.*)\)")
 
+@functools.lru_cache(maxsize=None)
 def parse_type_string(type_str):
     """
-    解析集合类型字符串。
+    解析集合类型字符串。结果按输入缓存，每个类型字符串只解析一次。
     
     Args:
         type_str: 待解析的字符串, 如 'list(Item)'。
@@ -30,7 +47,7 @@ def parse_type_string(type_str):
     """
     if not isinstance(type_str, str):
         return None, type_str
-    match = TYPE_STRING_REGEX.match(type_str.strip())
+    match = TYPE_STRING_REGEX.fullmatch(type_str.strip())
     if match:
         return match.group(1), match.group(2)
     return None, type_str
@@ -40,34 +57,106 @@ class TypeSystem:
     管理所有已加载的类型定义和默认解析模式。
     它会递归加载所有导入的 .innertypesdef.json 文件，并提供一个统一的接口来查询类型。
     """
-    def __init__(self, metadata_dir: str):
+    def __init__(self, metadata_dir: str, cache_path: str | None = None):
         self._loaded_types = {}
         self._default_schemas = {}
+        self._loaded_files: set[str] = set() # 已加载过的类型定义文件的绝对路径
         self.metadata_dir = metadata_dir # 存储元数据根目录
+        self._file_index: dict[str, str] = {} # 相对路径（不含后缀）-> 绝对路径，由预扫描填充，见 `index_type_def_file`
+        # 可选的解析结果缓存文件：绝对路径 -> [mtime_ns, size, 解析结果]，见 `_read_type_def_file` 与 `save_cache`
+        self._cache_path = cache_path
+        self._file_cache: dict[str, list] = self._load_cache() if cache_path else {}
+        self._cache_dirty = False
+
+    def _load_cache(self) -> dict[str, list]:
+        """
+        读取上次运行保存的解析结果缓存。
+
+        缓存文件不存在、已损坏，或其中任意一项不是 [int, int, dict] 形式时，整个缓存视为空。
+        """
+        try:
+            cache = _json_loads(Path(self._cache_path).read_bytes())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict):
+            return {}
+        for entry in cache.values():
+            if not (isinstance(entry, list) and len(entry) == 3
+                    and type(entry[0]) is int and type(entry[1]) is int and isinstance(entry[2], dict)):
+                return {}
+        return cache
+
+    def save_cache(self):
+        """
+        如果启用了缓存且缓存内容有变化，则将缓存写回磁盘。
+
+        只保留本次运行加载过的文件，已删除或不再被引用的类型定义文件不会一直留在缓存中。
+        内容先写入临时文件再替换缓存文件，写入中途被打断也不会留下残缺的缓存。
+        """
+        if not self._cache_path:
+            return
+        cache = {path: entry for path, entry in self._file_cache.items() if path in self._loaded_files}
+        if not self._cache_dirty and len(cache) == len(self._file_cache):
+            return
+        os.makedirs(os.path.dirname(self._cache_path) or ".", exist_ok=True)
+        tmp_path = f"{self._cache_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self._cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._file_cache = cache
+        self._cache_dirty = False
+
+    def _read_type_def_file(self, abs_path: str) -> dict:
+        """
+        读取并解析一个类型定义文件。
+
+        启用缓存时，文件的修改时间与大小均未变化则直接返回上次的解析结果，不再读取和解析文件。
+        """
+        if not self._cache_path:
+            # 一次读出全部字节再解析，省去文本模式的解码与缓冲层
+            return _json_loads(Path(abs_path).read_bytes())
+        st = os.stat(abs_path)
+        entry = self._file_cache.get(abs_path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        data = _json_loads(Path(abs_path).read_bytes())
+        self._file_cache[abs_path] = [st.st_mtime_ns, st.st_size, data]
+        self._cache_dirty = True
+        return data
+
+    def index_type_def_file(self, rel_path_from_meta: str, abs_path: str):
+        """登记一个已在磁盘上找到的类型定义文件，之后按相对路径加载它时无需再拼接和规范化路径。"""
+        self._file_index[rel_path_from_meta] = abs_path
 
     def load_type_def(self, rel_path_from_meta: str, silent: bool = False):
         """
         加载并解析一个 .innertypesdef.json 文件。
         路径总是相对于 metadata 根目录，且不包含后缀。
         """
-        full_path = os.path.join(self.metadata_dir, f"{rel_path_from_meta}.innertypesdef.json")
-        abs_path = os.path.abspath(full_path)
+        abs_path = self._file_index.get(rel_path_from_meta)
+        if abs_path is None:
+            abs_path = os.path.abspath(os.path.join(self.metadata_dir, f"{rel_path_from_meta}.innertypesdef.json"))
 
-        if abs_path in self._loaded_types.get("@@files", set()):
+        if abs_path in self._loaded_files:
             return
         
         if not silent:
-            print(f"  -> 加载类型定义: {os.path.basename(full_path)}")
+            print(f"  -> 加载类型定义: {os.path.basename(abs_path)}")
         
         try:
-            with open(abs_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_type_def_file(abs_path)
         except FileNotFoundError:
+            full_path = os.path.join(self.metadata_dir, f"{rel_path_from_meta}.innertypesdef.json")
             raise FileNotFoundError(f"找不到导入的类型定义文件: {full_path}")
         except json.JSONDecodeError as e:
             raise ValueError(f"'{abs_path}' 文件错误: {e}")
         
-        self._loaded_types.setdefault("@@files", set()).add(abs_path)
+        self._loaded_files.add(abs_path)
 
         # 递归加载导入的类型，路径同样相对于 metadata 根目录
         for p in data.get("ImportTypes", []):
@@ -80,15 +169,23 @@ class TypeSystem:
             self._default_schemas[type_expr] = schema
 
     def get_type(self, name: str) -> dict:
-        """根据名称获取类型定义。"""
-        if name in self._loaded_types:
-            return self._loaded_types[name]
-        
-        coll, _ = parse_type_string(name)
-        if coll or name in ["int", "long", "string", "bool", "float"]:
+        """根据名称获取类型定义。类型未定义时抛出 ValueError。"""
+        t_def = self.try_get_type(name)
+        if t_def is None:
+            raise ValueError(f"类型 '{name}' 未在任何 .typedef 或 .innertypesdef 文件中定义。")
+        return t_def
+
+    def try_get_type(self, name: str) -> dict | None:
+        """与 `get_type` 相同，但类型未定义时返回 None 而不是抛出异常，适合在遍历中频繁调用。"""
+        t_def = self._loaded_types.get(name)
+        if t_def is not None:
+            return t_def
+        t_def = _PRIMITIVE_TYPE_DEFS.get(name)
+        if t_def is not None:
+            return t_def
+        if parse_type_string(name)[0]:
             return {"TargetType": name}
-            
-        raise ValueError(f"类型 '{name}' 未在任何 .typedef 或 .innertypesdef 文件中定义。")
+        return None
     
     def get_default_schema(self, type_expr: str) -> dict | None:
         """根据完整的类型表达式获取默认的解析模式。"""
@@ -96,54 +193,148 @@ class TypeSystem:
 
     def get_all_custom_type_names(self) -> list[str]:
         """获取所有已加载的自定义类型名称。"""
-        return [k for k in self._loaded_types.keys() if k != "@@files"]
+        return list(self._loaded_types)
+
+def _iter_files(root: str, suffix: str) -> Iterator[str]:
+    """
+    递归地列出 root 下所有名称以 suffix 结尾的文件路径，顺序与 `os.walk` 自顶向下遍历一致。
+
+    基于 `os.scandir`：目录项的类型随目录读取一并返回，无需再逐个 stat。无法读取的目录被跳过。
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                # 与 `os.walk` 一样不进入指向目录的符号链接
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.endswith(suffix):
+                yield entry.path
+        # 逆序入栈，保证子目录按原顺序出栈
+        stack.extend(reversed(subdirs))
+
+def _intern(value):
+    """驻留字符串，使各表中重复出现的字段名与类型语法共享同一对象；非字符串原样返回。"""
+    return sys.intern(value) if type(value) is str else value
+
+def _make_row_getter(col_indices: tuple[int, ...]):
+    """
+    返回按给定列号从一行中取值的函数，结果始终为元组。
+
+    `itemgetter` 在只有一个列号时返回单个值、没有列号时无法构造，这两种情况单独处理。
+    """
+    if len(col_indices) > 1:
+        return operator.itemgetter(*col_indices)
+    if col_indices:
+        col_idx = col_indices[0]
+        return lambda row_data: (row_data[col_idx],)
+    return lambda row_data: ()
+
+def _pad_rows(rows, width: int):
+    """
+    把行补齐到至少 width 列。
+
+    重置尺寸后，只读模式按每行实际存在的单元格返回，末尾的空单元格会被省略，整行为空时返回空列表。
+    """
+    pad = (None,) * width
+    for row_data in rows:
+        if len(row_data) < width:
+            row_data = tuple(row_data) + pad[len(row_data):]
+        yield row_data
+
+def _read_excel_table(excel_path: str, typedef_data: dict, table: ConfigTable) -> ConfigTable:
+    """
+    解析单个 Excel 文件的内容，填充到 table 中并返回。
+
+    只依赖传入的参数，不访问类型系统，因此可以在工作进程中执行。
+    """
+    # 只读模式按行流式解析工作表，不加载样式，也不在内存中构建完整的单元格对象
+    workbook = openpyxl.load_workbook(excel_path, data_only=True, read_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # 只读模式默认信任文件中记录的 <dimension>，该记录过期时会静默丢掉超出范围的行和列，
+        # 因此忽略它，按实际存在的单元格读取（行可能变短，由解析函数补齐）
+        sheet.reset_dimensions()
+        # 整个工作表只顺序遍历一次：第一行既是备用的表注释，也是平铺表的表头
+        rows = sheet.iter_rows(values_only=True)
+        first_row = next(rows, ())
+        
+        # 优先使用 typedef 文件中定义的 Comment
+        table.table_comment = table.table_comment or (first_row[0] if first_row else None) or f"由 {table.excel_file_name} 生成的配置"
+        
+        if table.is_flat_table:
+            ConfigReader._parse_flat_table(first_row, rows, table)
+        else:
+            ConfigReader._parse_standard_table(rows, typedef_data, table)
+    finally:
+        # 只读模式会一直占用文件句柄，必须显式关闭
+        workbook.close()
+    return table
 
 class ConfigReader:
     """
     读取所有配置并将其解析为语言无关的中间数据结构 (ConfigTable)。
     """
-    def __init__(self, input_dir: str, metadata_dir: str, typedef_suffix: str):
+    def __init__(self, input_dir: str, metadata_dir: str, typedef_suffix: str, type_cache_path: str | None = None):
         self.input_dir = input_dir
         self.metadata_dir = metadata_dir
         self.typedef_suffix = typedef_suffix
-        self.type_system = TypeSystem(self.metadata_dir)
+        self.type_system = TypeSystem(self.metadata_dir, type_cache_path)
         self._scan_all_innertypes()
 
     def _scan_all_innertypes(self):
         """预扫描并加载 metadata 目录下的所有 innertype 定义。"""
         suffix = ".innertypesdef.json"
-        for root, _, files in os.walk(self.metadata_dir):
-            for file in files:
-                if file.endswith(suffix):
-                    try:
-                        full_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(full_path, self.metadata_dir)
-                        
-                        # 可靠地移除后缀，避免 `splitext` 的问题
-                        if rel_path.endswith(suffix):
-                            rel_path_no_ext = rel_path[:-len(suffix)]
-                        else:
-                            rel_path_no_ext = os.path.splitext(rel_path)[0]
-
-                        self.type_system.load_type_def(rel_path_no_ext.replace('\\', '/'), silent=True)
-                    except ValueError as e:
-                        print(f"警告: 无法解析 {file}。错误: {e}")
+        for full_path in _iter_files(self.metadata_dir, suffix):
+            try:
+                rel_path = os.path.relpath(full_path, self.metadata_dir)
+                
+                # 可靠地移除后缀，避免 `splitext` 的问题
+                if rel_path.endswith(suffix):
+                    rel_path_no_ext = rel_path[:-len(suffix)]
+                else:
+                    rel_path_no_ext = os.path.splitext(rel_path)[0]
+
+                rel_path_no_ext = rel_path_no_ext.replace('\\', '/')
+                self.type_system.index_type_def_file(rel_path_no_ext, os.path.abspath(full_path))
+                self.type_system.load_type_def(rel_path_no_ext, silent=True)
+            except ValueError as e:
+                print(f"警告: 无法解析 {os.path.basename(full_path)}。错误: {e}")
 
     def read_all(self) -> list[ConfigTable]:
-        """读取 input_dir 中的所有 Excel 文件并返回 ConfigTable 对象列表。"""
-        tables = []
+        """
+        读取 input_dir 中的所有 Excel 文件并返回 ConfigTable 对象列表。
+
+        typedef 与其导入的类型定义在主进程中依次加载；Excel 文件的解析彼此独立，
+        文件较多时交给进程池并行完成，结果仍按文件顺序返回。
+        """
+        jobs = []
         excel_files = [f for f in os.listdir(self.input_dir) if f.endswith('.xlsx') and not f.startswith('~')]
+        # 一次列出 metadata 根目录下的全部 typedef 文件，之后按表名查表，不必对每个 Excel 文件单独检查文件是否存在。
+        # 键经 normcase 规范化；查不到时再退回 os.path.exists，以兼顾 normcase 不做大小写折叠、但文件系统本身不区分大小写的平台（如 macOS）
+        suffix_len = len(self.typedef_suffix)
+        with os.scandir(self.metadata_dir) as it:
+            typedef_paths = {os.path.normcase(e.name[:-suffix_len]): e.path for e in it if e.name.endswith(self.typedef_suffix)}
         
         for excel_file in excel_files:
             base_name = os.path.splitext(excel_file)[0]
-            typedef_path = os.path.join(self.metadata_dir, f"{base_name}{self.typedef_suffix}")
+            typedef_path = typedef_paths.get(os.path.normcase(base_name))
+            if typedef_path is None:
+                fallback_path = os.path.join(self.metadata_dir, f"{base_name}{self.typedef_suffix}")
+                if os.path.exists(fallback_path):
+                    typedef_path = fallback_path
             
-            if not os.path.exists(typedef_path):
+            if typedef_path is None:
                 print(f"提示: 找不到 '{excel_file}' 对应的 typedef 文件，已跳过。")
                 continue
             
-            with open(typedef_path, 'r', encoding='utf-8') as f:
-                typedef_data = json.load(f)
+            typedef_data = _json_loads(Path(typedef_path).read_bytes())
             
             for imp in typedef_data.get("ImportTypes", []):
                 self.type_system.load_type_def(imp)
@@ -153,33 +344,27 @@ class ConfigReader:
                 if main_type_name not in self.type_system._loaded_types:
                     self.type_system._loaded_types[main_type_name] = typedef_data
 
-            workbook = openpyxl.load_workbook(os.path.join(self.input_dir, excel_file), data_only=True)
-            sheet = workbook.worksheets[0]
-            
-            # 优先使用 typedef 文件中定义的 Comment
-            table_comment = typedef_data.get("Comment") or sheet.cell(row=1, column=1).value or f"由 {excel_file} 生成的配置"
-
             table = ConfigTable(
                 excel_file_name=excel_file,
                 base_name=base_name,
                 is_flat_table=typedef_data.get("IsFlatTable", False),
                 target_type_name=main_type_name,
-                table_comment=table_comment
+                table_comment=typedef_data.get("Comment") or ""
             )
-            
-            if table.is_flat_table:
-                self._parse_flat_table(sheet, table)
-            else:
+            if not table.is_flat_table:
                 table.primary_key_fields = typedef_data.get("PrimaryKeyFields", [])
-                self._parse_standard_table(sheet, typedef_data, table)
-                
-            tables.append(table)
-            
-        return tables
+            jobs.append((os.path.join(self.input_dir, excel_file), typedef_data, table))
 
-    def _parse_flat_table(self, sheet, table: ConfigTable):
-        """解析平铺式表格。"""
-        header = [c.value for c in sheet[1]]
+        workers = min(os.cpu_count() or 1, len(jobs))
+        if len(jobs) < PARALLEL_MIN_TABLES or workers < 2:
+            return [_read_excel_table(*job) for job in jobs]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_read_excel_table, *zip(*jobs)))
+
+    @staticmethod
+    def _parse_flat_table(header_row: tuple, rows, table: ConfigTable):
+        """解析平铺式表格。header_row 为表头行，rows 为其后数据行的迭代器。"""
+        header = list(header_row)
         try:
             key_idx = header.index('Key')
             type_idx = header.index('Type')
@@ -188,18 +373,15 @@ class ConfigReader:
         except ValueError as e:
             raise ValueError(f"平铺表 '{table.excel_file_name}' 缺少必需的列: {e}。应包含 'Key', 'Type', 'Value', 'Comment'(可选)。")
             
-        for row_data in sheet.iter_rows(min_row=2, values_only=True):
-            if row_data[key_idx] is None:
-                continue
-            table.rows.append(ConfigRow(
-                key=row_data[key_idx],
-                type_syntax=row_data[type_idx],
-                value=row_data[val_idx],
-                comment=row_data[cmt_idx] if cmt_idx != -1 else ""
-            ))
+        # 按 ConfigRow 的字段顺序 (key, type_syntax, value, comment) 一次取出各列；没有注释列时 comment 取默认值
+        col_indices = (key_idx, type_idx, val_idx) if cmt_idx == -1 else (key_idx, type_idx, val_idx, cmt_idx)
+        getter = operator.itemgetter(*col_indices)
+        rows = _pad_rows(rows, max(col_indices) + 1)
+        table.rows.extend(ConfigRow(*getter(row_data)) for row_data in rows if row_data[key_idx] is not None)
     
-    def _parse_standard_table(self, sheet, typedef_data: dict, table: ConfigTable):
-        """解析标准表格，使用新的 FieldSequence 结构。"""
+    @staticmethod
+    def _parse_standard_table(rows, typedef_data: dict, table: ConfigTable):
+        """解析标准表格，使用新的 FieldSequence 结构。rows 为从表头行（第 2 行）开始的行迭代器。"""
         field_definitions = typedef_data.get("FieldSequence", [])
         
         # 将 typedef 中的定义转换为 ConfigRow 对象
@@ -208,20 +390,34 @@ class ConfigReader:
             if not field_name:
                 continue
             table.rows.append(ConfigRow(
-                key=field_name,
-                type_syntax=field_def.get("Type", "string"),
+                key=_intern(field_name),
+                type_syntax=_intern(field_def.get("Type", "string")),
                 comment=field_def.get("Comment", "")
             ))
         
         # 读取数据行
-        headers = {c.value: i for i, c in enumerate(sheet[2]) if c.value}
-        for row_data in sheet.iter_rows(min_row=3, values_only=True):
-            if all(v is None for v in row_data):
-                continue
-            ordered_row = []
-            for field in table.rows:
-                col_idx = headers.get(field.key)
-                if col_idx is None:
-                    raise ValueError(f"'{table.excel_file_name}' 的 Excel 文件中缺少列 '{field.key}'。")
-                ordered_row.append(row_data[col_idx])
-            table.data_rows.append(ordered_row)
+        headers = {value: i for i, value in enumerate(next(rows, ())) if value}
+        # 表头与 typedef 是否匹配只需在读取数据前校验一次
+        missing = [field.key for field in table.rows if field.key not in headers]
+        if missing:
+            missing_cols = "', '".join(missing)
+            raise ValueError(f"'{table.excel_file_name}' 的 Excel 文件中缺少列 '{missing_cols}'。")
+
+        # 各字段对应的列号与行无关，在循环外一次算好
+        col_indices = tuple(headers[field.key] for field in table.rows)
+        getter = _make_row_getter(col_indices)
+
+        # 哨兵列（优先取第一个主键列）非空即说明该行不是空行，无需再扫描整行；
+        # 哨兵为空时才退回整行检查（tuple.count 在 C 层完成比较），因此主键缺失的数据行仍会保留
+        sentinel = headers.get(table.primary_key_fields[0]) if table.primary_key_fields else None
+        if sentinel is None and col_indices:
+            sentinel = col_indices[0]
+        if col_indices:
+            rows = _pad_rows(rows, max(*col_indices, sentinel) + 1)
+        if sentinel is None:
+            data_rows = (row_data for row_data in rows if row_data.count(None) != len(row_data))
+        else:
+            data_rows = (row_data for row_data in rows
+                         if row_data[sentinel] is not None or row_data.count(None) != len(row_data))
+        # 直接消费行迭代器，不构造中间列表；取出的列值元组直接作为数据行保存，不再复制为列表
+        table.data_rows.extend(map(getter, data_rows))
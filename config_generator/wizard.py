@@ -12,27 +12,60 @@ import click
 import json
 import datetime
 import os
+from itertools import islice
+from pathlib import Path
 import openpyxl
 
 # 由于此模块被动态加载，我们从父级导入必要的类
-from .readers import TypeSystem
+from .readers import TypeSystem, _iter_files, _json_loads
 
 def _scan_existing_innertypes(type_system: TypeSystem, metadata_dir: str, inner_type_def_suffix: str):
     """
     预扫描并加载 metadata 目录下的所有 innertype 定义，以填充类型系统的选项。
     """
-    for root, _, files in os.walk(metadata_dir):
-        for file in files:
-            if file.endswith(inner_type_def_suffix):
-                try:
-                    type_system.load_type_def(os.path.join(root, file), silent=True)
-                except ValueError as e:
-                    click.echo(click.style(f"警告: 无法解析 {file}。错误: {e}", fg='yellow'))
+    for full_path in _iter_files(metadata_dir, inner_type_def_suffix):
+        try:
+            type_system.load_type_def(full_path, silent=True)
+        except ValueError as e:
+            click.echo(click.style(f"警告: 无法解析 {os.path.basename(full_path)}。错误: {e}", fg='yellow'))
+
+def _read_excel_headers(excel_path: str) -> tuple[list[str], dict]:
+    """
+    读取标准表格的表头（第 2 行）与表头注释（第 1 行）。
+    返回 (表头列表, {表头: 注释})。
+    """
+    # 只读模式流式读取，只取前两行，读完立即关闭释放文件句柄
+    workbook = openpyxl.load_workbook(excel_path, data_only=True, read_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # 不信任文件中记录的 <dimension>：它过期时只读模式会截断表头，导致字段被遗漏
+        sheet.reset_dimensions()
+        rows = islice(sheet.iter_rows(values_only=True), 2)
+        comment_row, header_row = next(rows, ()), next(rows, ())
+    finally:
+        workbook.close()
+    headers = [h for h in header_row if h]
+    header_comments = {h: comment_row[i] if i < len(comment_row) else None for i, h in enumerate(header_row) if h}
+    return headers, header_comments
 
 def _save_json(path: str, data: dict):
-    """以美观的格式保存 JSON 文件。"""
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    """
+    以美观的格式保存 JSON 文件。
+
+    typedef 文件通常纳入版本管理，因此保持标准库的 4 空格缩进输出，不使用只支持 2 空格缩进的 orjson。
+    内容先完整序列化，一次写入临时文件后再替换目标文件，写入中途出错也不会留下残缺的 JSON。
+    """
+    # 换行符仍按平台转换，与文本模式写入的结果保持一致
+    payload = json.dumps(data, indent=4, ensure_ascii=False).replace('\n', os.linesep).encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 def _create_new_inner_type_interactive(type_system: TypeSystem, metadata_dir: str, inner_type_def_suffix: str) -> tuple[str, str]:
     """
@@ -148,6 +181,8 @@ def _update_existing_typedef(data: dict, path: str, headers: list[str], header_c
     """比对并更新一个已存在的标准表格 typedef 文件。"""
     type_system = TypeSystem()
     _scan_existing_innertypes(type_system, metadata_dir, inner_type_def_suffix)
+    # 与 ImportTypes 列表同步维护的集合，去重检查为 O(1)，列表仍保持添加顺序
+    seen_imports = set(data.get("ImportTypes", ()))
     
     current_comment = data.get("Comment", "")
     new_comment = click.prompt("编辑主类注释", default=current_comment)
@@ -167,7 +202,8 @@ def _update_existing_typedef(data: dict, path: str, headers: list[str], header_c
             if field_def:
                 data["FieldSequence"].append(field_def)
             for imp in imps:
-                if imp not in data["ImportTypes"]:
+                if imp not in seen_imports:
+                    seen_imports.add(imp)
                     data["ImportTypes"].append(imp)
 
     if removed_fields:
@@ -195,7 +231,8 @@ def _update_existing_typedef(data: dict, path: str, headers: list[str], header_c
                 if updated_def:
                     data["FieldSequence"][idx] = updated_def
                 for imp in imps:
-                    if imp not in data["ImportTypes"]:
+                    if imp not in seen_imports:
+                        seen_imports.add(imp)
                         data["ImportTypes"].append(imp)
 
     _save_json(path, data)
@@ -218,12 +255,9 @@ def _create_new_typedef(typedef_path: str, base_name: str, input_dir: str, metad
     if not data["IsFlatTable"]:
         excel_path = os.path.join(input_dir, data["ExcelFileName"])
         try:
-            sheet = openpyxl.load_workbook(excel_path, data_only=True).worksheets[0]
+            headers, header_comments = _read_excel_headers(excel_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"找不到对应的Excel文件: {excel_path}")
-            
-        headers = [c.value for c in sheet[2] if c.value]
-        header_comments = {sheet.cell(row=2, column=i+1).value: sheet.cell(row=1, column=i+1).value for i, h in enumerate(sheet[2]) if h.value}
         
         pk_str = click.prompt(f"从 [{', '.join(headers)}] 中输入主键字段, 逗号分隔", default=headers[0] if headers else "Id")
         data["PrimaryKeyFields"] = [k.strip() for k in pk_str.split(',')]
@@ -231,13 +265,15 @@ def _create_new_typedef(typedef_path: str, base_name: str, input_dir: str, metad
         
         type_system = TypeSystem()
         _scan_existing_innertypes(type_system, metadata_dir, inner_type_def_suffix)
+        seen_imports = set(data["ImportTypes"])
         
         for h in headers:
             field_def, imps = _define_field_interactive(h, type_system, metadata_dir, inner_type_def_suffix, default_comment=header_comments.get(h, ""))
             if field_def:
                 data["FieldSequence"].append(field_def)
             for imp in imps:
-                if imp not in data["ImportTypes"]:
+                if imp not in seen_imports:
+                    seen_imports.add(imp)
                     data["ImportTypes"].append(imp)
 
     _save_json(typedef_path, data)
@@ -277,13 +313,10 @@ def typedef_command(ctx):
         _create_new_typedef(typedef_path, base_name, input_dir, metadata_dir, inner_type_def_suffix)
     else:
         click.echo(f"找到 '{excel_file}' 的现有typedef。检查更新...")
-        with open(typedef_path, 'r', encoding='utf-8') as f:
-            typedef_data = json.load(f)
+        typedef_data = _json_loads(Path(typedef_path).read_bytes())
         
         if typedef_data.get("IsFlatTable"):
             click.echo(click.style("这是一个平铺式表格的Typedef, 其结构定义在Excel内部, 无需更新。", fg='blue'))
         else:
-            sheet = openpyxl.load_workbook(excel_path, data_only=True).worksheets[0]
-            excel_headers = [c.value for c in sheet[2] if c.value]
-            header_comments = {sheet.cell(row=2, column=i+1).value: sheet.cell(row=1, column=i+1).value for i, h in enumerate(sheet[2]) if h.value}
+            excel_headers, header_comments = _read_excel_headers(excel_path)
             _update_existing_typedef(typedef_data, typedef_path, excel_headers, header_comments, metadata_dir, inner_type_def_suffix)
@@ -8,37 +8,92 @@
 # ==============================================================================
 
 # /config_generator/writers.py
+import os
 import struct
 import json
 import re
-from collections import deque
-from .models import ConfigTable
+import functools
+import concurrent.futures
+from typing import Iterator
+from .models import ConfigTable, PARALLEL_MIN_TABLES, PRIMITIVE_TYPE_NAMES
 
 # 用于解析统一类型语法，例如 'list(Item)["~", "#"]'
 UNIFIED_TYPE_SYNTAX_REGEX = re.compile(r"^(.*?)(\[.*\])?$")
+# 统一类型语法的快速路径：类型部分不含 '[' 与换行时适用，无需像上面的惰性匹配那样逐字符回溯
+_UNIFIED_TYPE_SYNTAX_FAST_REGEX = re.compile(r"([^\[\n]*)(\[.*\])?")
 # 用于解析集合类型，例如 list(Item)
-TYPE_STRING_REGEX = re.compile(r"^(list|set|array)\((.*)\)$")
+TYPE_STRING_REGEX = re.compile(r"(list|set|array)\((.*)\)")
+
+# 预编译的基元类型打包格式，避免每次写入都重新解析格式字符串
+_BOOL = struct.Struct('?')
+_INT = struct.Struct('<i')
+_LONG = struct.Struct('<q')
+_FLOAT = struct.Struct('<f')
+
+# 流式写出时，缓冲区累积到该大小后才写入目标文件
+_FLUSH_THRESHOLD = 1 << 18
+# 不超过该长度的字符串会缓存其编码结果（含长度前缀），配置表中的短字符串通常大量重复
+_STRING_CACHE_MAX_LEN = 64
+# 每张表最多缓存的字符串个数，缓存写满后不再加入新的字符串，保证内存占用有上限
+_STRING_CACHE_MAX_ENTRIES = 4096
 
 class BinaryWriter:
-    """一个将基元类型写入字节数组的辅助类。"""
-    def __init__(self):
+    """
+    一个将基元类型写入字节数组的辅助类。
+
+    若提供了 `sink`（任何带 `write` 方法的二进制流），调用方可以通过 `flush`
+    把已累积的字节分块写入其中，从而不必在内存中保留整张表的数据。
+    交给 sink 的缓冲区此后不会再被修改，sink 可以稍后（例如在另一个线程中）再写出它。
+    """
+    __slots__ = ('buffer', 'sink', 'bytes_flushed', '_encoded_strings')
+
+    def __init__(self, sink=None):
         self.buffer = bytearray()
+        self.sink = sink
+        self.bytes_flushed = 0 # 已写入 sink 的字节数
+        self._encoded_strings: dict[str, bytes] = {} # 短字符串 -> 长度前缀 + UTF-8 编码
+
+    def reset(self, sink=None):
+        """
+        清空已写入的数据与短字符串的编码缓存，以便复用于下一张表。
+        缓冲区换成新的对象而不是原地清空，因为上一次 `write` 可能已把旧缓冲区返回给调用方。
+        """
+        self.buffer = bytearray()
+        self.sink = sink
+        self.bytes_flushed = 0
+        self._encoded_strings.clear()
+
+    def flush(self):
+        """将缓冲区中的字节交给 sink，并换用新的缓冲区。没有 sink 时不做任何事。"""
+        if self.sink is not None and self.buffer:
+            buffer, self.buffer = self.buffer, bytearray()
+            self.sink.write(buffer)
+            self.bytes_flushed += len(buffer)
+
+    def write_raw(self, data: bytes):
+        """原样写入已打包好的字节。"""
+        self.buffer += data
+
+    @property
+    def bytes_written(self) -> int:
+        """已写入的总字节数，包括尚在缓冲区中的部分。"""
+        return self.bytes_flushed + len(self.buffer)
 
     def write_bool(self, v: bool):
         """将布尔值作为1个字节写入。"""
-        self.buffer += struct.pack('?', bool(v))
+        self.buffer += _BOOL.pack(bool(v))
 
     def write_int(self, v: int):
         """将整数作为4字节的小端序整数写入。"""
-        self.buffer += struct.pack('<i', int(v) if v is not None else 0)
+        self.buffer += _INT.pack(int(v) if v is not None else 0)
 
     def write_long(self, v: int):
         """将长整数作为8字节的小端序整数写入。"""
-        self.buffer += struct.pack('<q', int(v) if v is not None else 0)
+        self.buffer += _LONG.pack(int(v) if v is not None else 0)
 
     def write_float(self, v: float):
         """将浮点数作为4字节浮点数写入。"""
-        self.buffer += struct.pack('<f', float(v) if v is not None else 0.0)
+        self.buffer += _FLOAT.pack(float(v) if v is not None else 0.0)
 
     def write_string(self, v: str):
         """
@@ -48,80 +103,215 @@ class BinaryWriter:
         if v is None:
             self.write_int(0)
             return
-        encoded_bytes = str(v).encode('utf-8')
-        self.write_int(len(encoded_bytes))
-        self.buffer += encoded_bytes
+        # 只缓存真正的 str：其他类型的值（如 5 与 5.0）可能相等却有不同的字符串形式
+        if type(v) is str:
+            data = self._encoded_strings.get(v)
+            if data is None:
+                encoded_bytes = v.encode('utf-8')
+                data = _INT.pack(len(encoded_bytes)) + encoded_bytes
+                if len(v) <= _STRING_CACHE_MAX_LEN and len(self._encoded_strings) < _STRING_CACHE_MAX_ENTRIES:
+                    self._encoded_strings[v] = data
+        else:
+            encoded_bytes = str(v).encode('utf-8')
+            data = _INT.pack(len(encoded_bytes)) + encoded_bytes
+        # 长度前缀与内容一次写入，缓冲区只增长一次
+        self.buffer += data
+
+# 常用深度的缩进字符串，避免每行都重新拼接
+_INDENTS = tuple("  " * i for i in range(64))
 
 class LayoutWriter:
-    """一个将二进制布局结构写入文本的辅助类，用于调试。"""
+    """
+    一个将二进制布局结构写入文本的辅助类，用于调试。
+
+    记录时只保存 (缩进层级, ...) 元组，`repr` 与整行文本的格式化推迟到 `get_content` 中一次完成。
+    """
+    __slots__ = ('entries', 'indent_level')
+
     def __init__(self):
-        self.lines = []
+        self.entries = []
         self.indent_level = 0
 
-    def _indent(self) -> str:
-        return "  " * self.indent_level
-
     def log(self, type_name: str, field_name: str, value: any):
         """记录一条布局信息。"""
-        value_str = repr(value)
-        if len(value_str) > 100:
-            value_str = value_str[:100] + "..."
-        self.lines.append(f"{self._indent()}[{type_name}] {field_name} = {value_str}\n")
+        self.entries.append((self.indent_level, type_name, field_name, value))
 
     def enter_scope(self, scope_name: str):
         """进入一个新的数据范围（如类或列表），增加缩进。"""
-        self.lines.append(f"{self._indent()}{scope_name} {{\n")
+        self.entries.append((self.indent_level, scope_name))
         self.indent_level += 1
 
     def exit_scope(self):
         """退出当前数据范围，减少缩进。"""
         self.indent_level -= 1
-        self.lines.append(f"{self._indent()}}}\n")
+        self.entries.append((self.indent_level,))
         
+    def reset(self):
+        """清空已记录的内容以便复用于下一张表。"""
+        self.entries.clear()
+        self.indent_level = 0
+
     def get_content(self) -> str:
         """获取完整的布局文本内容。"""
-        return "".join(self.lines)
+        lines = []
+        append = lines.append
+        for entry in self.entries:
+            level = entry[0]
+            indent = _INDENTS[level] if 0 <= level < 64 else "  " * level
+            if len(entry) == 4: # 一条记录
+                value_str = repr(entry[3])
+                if len(value_str) > 100:
+                    value_str = value_str[:100] + "..."
+                append(f"{indent}[{entry[1]}] {entry[2]} = {value_str}\n")
+            elif len(entry) == 2: # 进入范围
+                append(f"{indent}{entry[1]} {{\n")
+            else: # 退出范围
+                append(f"{indent}}}\n")
+        return "".join(lines)
+
+class NullLayoutWriter:
+    """不生成布局文本时使用的空实现，所有记录操作都直接丢弃。"""
+    __slots__ = ()
+
+    def log(self, type_name: str, field_name: str, value: any):
+        pass
+
+    def enter_scope(self, scope_name: str):
+        pass
+
+    def exit_scope(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def get_content(self) -> str:
+        return ""
 
+@functools.lru_cache(maxsize=None)
 def parse_type_string(type_str: str):
-    """解析集合类型字符串，如 'list(Item)'。"""
+    """解析集合类型字符串，如 'list(Item)'。结果按输入缓存，每个类型字符串只解析一次。"""
     if not isinstance(type_str, str):
         return None, type_str
-    match = TYPE_STRING_REGEX.match(type_str.strip())
+    match = TYPE_STRING_REGEX.fullmatch(type_str.strip())
     if match:
         return match.group(1), match.group(2)
     return None, type_str
 
+@functools.lru_cache(maxsize=None)
 def parse_unified_syntax(type_syntax_str: str):
-    """解析统一的类型语法，例如 'list(Item)["~", "#"]'。"""
+    """
+    解析统一的类型语法，例如 'list(Item)["~", "#"]'。
+    结果按输入缓存，因此分隔符以元组形式返回，避免调用方修改共享的缓存值。
+    """
     if not isinstance(type_syntax_str, str):
         return type_syntax_str, None
-    match = UNIFIED_TYPE_SYNTAX_REGEX.match(type_syntax_str.strip())
+    stripped = type_syntax_str.strip()
+    match = _UNIFIED_TYPE_SYNTAX_FAST_REGEX.fullmatch(stripped) or UNIFIED_TYPE_SYNTAX_REGEX.match(stripped)
     if not match:
         return type_syntax_str, None
     main_type, delimiters_str = match.group(1).strip(), match.group(2)
     if delimiters_str:
         try:
-            return main_type, json.loads(delimiters_str)
+            return main_type, tuple(json.loads(delimiters_str))
         except json.JSONDecodeError:
             raise ValueError(f"类型字符串中的分隔符格式无效: {delimiters_str}。")
     return main_type, None
 
+# 类型字符串编译后的写入指令种类
+_OP_PRIMITIVE, _OP_COLLECTION, _OP_ENUM, _OP_CLASS = range(4)
+
+def _to_bool(value) -> bool:
+    """把单元格的值转换为布尔值：字符串只有 'true'、'1'、'yes'（不区分大小写）为真。"""
+    return value.lower() in ['true', '1', 'yes'] if type(value) is str else bool(value)
+
+# 工作栈中表示“退出当前范围”的哨兵项
+_SCOPE_EXIT = object()
+_SCOPE_EXIT_ENTRY = (None, _SCOPE_EXIT, None, None)
+# 定长基元类型的 struct 格式字符，用于把一行中相邻的定长字段合并打包
+_FIXED_WIDTH_FORMATS = {"int": "i", "long": "q", "float": "f", "bool": "?"}
+
+class _FixedRun:
+    """标准表中一段相邻的定长基元字段 (int/long/float/bool)，每行用一个 Struct 一次打包。"""
+    __slots__ = ('stop', 'packer', 'fields', 'specs')
+
+    def __init__(self, stop: int, kinds: list[str], specs: list[tuple[str, dict]]):
+        self.stop = stop                                                      # 该段之后第一列的下标
+        self.packer = struct.Struct('<' + ''.join(_FIXED_WIDTH_FORMATS[k] for k in kinds))
+        self.fields = tuple((k, context.get('col', 'N/A')) for k, (_, context) in zip(kinds, specs)) # (类型, 字段名)
+        self.specs = tuple(specs)                                             # (类型语法, 上下文)，出错时逐字段重写
+
+class _TypeOp:
+    """
+    一个类型字符串编译后的写入指令：类型字符串只解析一次、类型定义只查找一次。
+
+    集合元素与类字段的指令在首次写到它们时才编译（见 `CustomBinaryDataHandler._get_op`），
+    因此未定义的类型仍然只在真正写到时才报错。
+    """
+    __slots__ = ('kind', 'type_str', 'inner_type_str', 'inner_op', 'type_def', 'fields', 'field_ops', 'is_wrapper', 'may_be_json')
+
+    def __init__(self, kind: int, type_str: str):
+        self.kind = kind
+        self.type_str = type_str
+        self.inner_type_str = None # 集合：元素的类型字符串
+        self.inner_op = None       # 集合：元素的指令，首次写入元素时编译
+        self.type_def = None       # 枚举与类：类型定义
+        self.fields = ()           # 类：(字段名, 字段类型语法) 元组
+        self.field_ops = None      # 类：各字段的指令，首次写入该类时编译
+        self.is_wrapper = False    # 类：是否为包装类（只有一个集合字段）
+        # 只有集合与类会消费 JSON 预解析出的列表，基元与枚举的单元格按原样写入
+        self.may_be_json = kind == _OP_COLLECTION or kind == _OP_CLASS
+
 class CustomBinaryDataHandler:
     """
     负责将 Excel 数据解析并写入自定义二进制格式和布局文本。
     """
-    def __init__(self, type_system, writer: BinaryWriter, layout_writer: LayoutWriter):
+    __slots__ = ('type_system', 'writer', 'layout_writer', '_ops', '_plans', '_primitive_writers')
+
+    def __init__(self, type_system, writer: BinaryWriter, layout_writer: 'LayoutWriter | NullLayoutWriter'):
         self.type_system = type_system
         self.writer = writer
         self.layout_writer = layout_writer
+        self._ops: dict[str, _TypeOp] = {}                               # 类型字符串 -> 写入指令
+        self._plans: dict[str, tuple[_TypeOp, tuple | None]] = {} # 完整类型语法 -> (写入指令, 分隔符)
+        # 基元类型名 -> 预先绑定的写入方法；布尔值须先经 `_to_bool` 转换
+        self._primitive_writers = {
+            "string": writer.write_string, "int": writer.write_int, "long": writer.write_long,
+            "bool": writer.write_bool, "float": writer.write_float
+        }
+
+    def _get_op(self, type_str: str) -> _TypeOp:
+        """获取类型字符串对应的写入指令，每种类型字符串只编译一次。"""
+        op = self._ops.get(type_str)
+        if op is not None:
+            return op
+
+        collection_type, inner_type_str = parse_type_string(type_str)
+        if collection_type:
+            op = _TypeOp(_OP_COLLECTION, type_str)
+            op.inner_type_str = inner_type_str
+        elif type_str in PRIMITIVE_TYPE_NAMES:
+            op = _TypeOp(_OP_PRIMITIVE, type_str)
+        else:
+            type_def = self.type_system.get_type(type_str)
+            if type_def.get("TargetTypeAsEnum"):
+                op = _TypeOp(_OP_ENUM, type_str)
+            else: # 是一个类
+                op = _TypeOp(_OP_CLASS, type_str)
+                field_sequence = type_def.get("FieldSequence", [])
+                op.fields = tuple((field_def["Field"], field_def["Type"]) for field_def in field_sequence)
+                # 检查是否为包装类 (只有一个集合字段)
+                op.is_wrapper = len(op.fields) == 1 and parse_type_string(op.fields[0][1])[0] is not None
+            op.type_def = type_def
+        self._ops[type_str] = op
+        return op
+
+    def _get_plan(self, type_syntax_str: str) -> tuple[_TypeOp, tuple | None]:
+        """解析完整的类型语法，得到 (写入指令, 分隔符)，结果按类型语法缓存。"""
+        plan = self._plans.get(type_syntax_str)
+        if plan is not None:
+            return plan
 
-    def write_value(self, raw_value, type_syntax_str: str, context: dict):
-        """
-        写入单个值的主入口。它负责准备初始数据和解析规则队列。
-        """
-        if raw_value is None or raw_value == '':
-            raw_value = None
-        
         type_str, delimiters = parse_unified_syntax(type_syntax_str)
         
         # 优先使用显式定义的分隔符，否则查找默认模式
@@ -129,98 +319,179 @@ class CustomBinaryDataHandler:
             default_schema = self.type_system.get_default_schema(type_str)
             if default_schema:
                 delimiters = default_schema.get("string_delimiters")
+
+        plan = self._plans[type_syntax_str] = (self._get_op(type_str), tuple(delimiters) if delimiters else None)
+        return plan
+
+    def fixed_width_kind(self, type_syntax_str: str) -> str | None:
+        """若该类型语法是不带分隔符的定长基元类型，返回其类型名，否则返回 None。"""
+        try:
+            type_str, _ = parse_unified_syntax(type_syntax_str)
+        except ValueError:
+            return None # 留给 write_value 在真正写入时报错
+        if type_str not in _FIXED_WIDTH_FORMATS:
+            return None
+        op, delimiters = self._get_plan(type_syntax_str)
+        return None if delimiters else op.type_str
+
+    def write_fixed_run(self, values, run: _FixedRun):
+        """
+        用一个 Struct 打包一段相邻的定长基元字段。
+
+        每个值的预处理与转换规则和 `write_value` 完全相同；任何一步出错时改为逐字段写入，
+        以便报出与逐字段写入时相同的错误。
+        """
+        converted = []
+        logged = []
+        try:
+            for value, (kind, _) in zip(values, run.fields):
+                if value == '':
+                    value = None
+                if kind == "bool":
+                    value = _to_bool(value)
+                    converted.append(value)
+                elif kind == "float":
+                    converted.append(float(value) if value is not None else 0.0)
+                else: # int / long
+                    converted.append(int(value) if value is not None else 0)
+                logged.append(value)
+            packed = run.packer.pack(*converted)
+        except Exception:
+            for value, (type_syntax_str, context) in zip(values, run.specs):
+                self.write_value(value, type_syntax_str, context)
+            return
+
+        self.writer.write_raw(packed)
+        layout_writer = self.layout_writer
+        if type(layout_writer) is not NullLayoutWriter:
+            for value, (kind, name) in zip(logged, run.fields):
+                layout_writer.log(kind, name, value)
+
+    def write_value(self, raw_value, type_syntax_str: str, context: dict):
+        """
+        写入单个值的主入口。它负责准备初始数据和解析规则队列。
+        """
+        if raw_value is None or raw_value == '':
+            raw_value = None
         
-        delimiters_queue = deque(delimiters) if delimiters else deque()
+        op, delimiters = self._get_plan(type_syntax_str)
         
-        # 如果没有分隔符规则，但值是 JSON 字符串，则预解析它
-        if not delimiters and isinstance(raw_value, str) and raw_value.strip().startswith(('{', '[')):
+        # 如果没有分隔符规则，但集合或类的值是 JSON 字符串，则预解析它
+        if not delimiters and op.may_be_json and type(raw_value) is str and raw_value.strip().startswith(('{', '[')):
             try:
                 raw_value = json.loads(raw_value)
             except json.JSONDecodeError:
                 pass # 如果不是合法的JSON，则保持其字符串形式
 
-        self._write_recursive(raw_value, type_str, context.get('col', 'N/A'), delimiters_queue)
+        self._write_tree(raw_value, op, context.get('col', 'N/A'), delimiters or ())
 
-    def _write_recursive(self, data, type_str: str, field_name: str, delimiters: deque):
-        """根据类型字符串，递归地写入数据，并在需要时消耗分隔符。"""
-        collection_type, inner_type_str = parse_type_string(type_str)
+    def _write_primitive_items(self, items: list, name: str):
+        """按顺序写入基元类型的集合元素，结果与逐个元素经由工作栈写入时完全相同。"""
+        layout_writer = self.layout_writer
+        logging = type(layout_writer) is not NullLayoutWriter
+        write = self._primitive_writers[name]
+        if name == "bool":
+            items = [_to_bool(item) for item in items]
+        for i, item in enumerate(items):
+            write(item)
+            if logging:
+                layout_writer.log(name, f"[{i}]", item)
+
+    def _write_tree(self, data, op: _TypeOp, field_name: str, delimiters: tuple):
+        """
+        根据编译好的写入指令写入数据（及其所有嵌套的子项），并在需要时消耗分隔符。
+
+        使用显式的工作栈代替递归：子项逆序入栈以保持写入顺序，范围的结束以哨兵项表示。
+        整棵数据树共享同一个分隔符元组，每个栈项只记录自己已消耗到第几层（depth），无需复制。
+        """
+        writer, layout_writer = self.writer, self.layout_writer
+        primitive_writers = self._primitive_writers
+        n_delimiters = len(delimiters)
+        stack = [(data, op, field_name, 0)]
+        pop, push = stack.pop, stack.append
         
-        if collection_type:
-            items = []
-            if isinstance(data, str) and delimiters:
-                delimiter = delimiters.popleft()
-                items = data.split(delimiter) if data else []
-            elif isinstance(data, list):
-                items = data
-
-            self.writer.write_int(len(items))
-            self.layout_writer.log("int", f"{field_name}_count", len(items))
-            self.layout_writer.enter_scope(f"{field_name}: {type_str}")
-            for i, item in enumerate(items):
-                self._write_recursive(item, inner_type_str, f"[{i}]", delimiters.copy())
-            self.layout_writer.exit_scope()
-            return
-            
-        name = type_str
-        if name == "string":
-            self.writer.write_string(data)
-            self.layout_writer.log("string", field_name, data)
-        elif name == "int":
-            self.writer.write_int(data)
-            self.layout_writer.log("int", field_name, data)
-        elif name == "long":
-            self.writer.write_long(data)
-            self.layout_writer.log("long", field_name, data)
-        elif name == "bool":
-            bool_val = str(data).lower() in ['true', '1', 'yes'] if isinstance(data, str) else bool(data)
-            self.writer.write_bool(bool_val)
-            self.layout_writer.log("bool", field_name, bool_val)
-        elif name == "float":
-            self.writer.write_float(data)
-            self.layout_writer.log("float", field_name, data)
-        else:
-            type_def = self.type_system.get_type(name)
-            if type_def.get("TargetTypeAsEnum"):
+        while stack:
+            data, op, field_name, depth = pop()
+            if op is _SCOPE_EXIT:
+                layout_writer.exit_scope()
+                continue
+            kind = op.kind
+            name = op.type_str
+
+            if kind == _OP_PRIMITIVE:
+                if name == "bool":
+                    data = _to_bool(data)
+                primitive_writers[name](data)
+                layout_writer.log(name, field_name, data)
+
+            elif kind == _OP_COLLECTION:
+                items = []
+                if type(data) is str and depth < n_delimiters:
+                    delimiter = delimiters[depth]
+                    depth += 1
+                    items = data.split(delimiter) if data else []
+                elif type(data) is list:
+                    items = data
+
+                writer.write_int(len(items))
+                layout_writer.log("int", f"{field_name}_count", len(items))
+                layout_writer.enter_scope(f"{field_name}: {name}")
+                push(_SCOPE_EXIT_ENTRY)
+                if items:
+                    inner_op = op.inner_op
+                    if inner_op is None:
+                        inner_op = op.inner_op = self._get_op(op.inner_type_str)
+                    if inner_op.kind == _OP_PRIMITIVE:
+                        # 基元元素不会再嵌套，直接逐个写入，省去每个元素在工作栈上的往返
+                        self._write_primitive_items(items, inner_op.type_str)
+                    else:
+                        for i in range(len(items) - 1, -1, -1):
+                            push((items[i], inner_op, f"[{i}]", depth))
+
+            elif kind == _OP_ENUM:
                 enum_val = 0
                 if data is not None:
-                    if isinstance(data, int):
+                    if isinstance(data, int): # bool 也按整数处理，须保留 isinstance
                         enum_val = data
-                    elif isinstance(data, str):
-                        enum_val = type_def["EnumMembers"].get(data, 0)
-                self.writer.write_int(enum_val)
-                self.layout_writer.log(f"enum({name})", field_name, enum_val)
-            else: # 是一个类
-                field_sequence = type_def.get("FieldSequence", [])
-                
-                # 检查是否为包装类 (只有一个集合字段)
-                is_wrapper = (len(field_sequence) == 1 and 
-                              parse_type_string(field_sequence[0]["Type"])[0] is not None)
+                    elif type(data) is str:
+                        enum_val = op.type_def["EnumMembers"].get(data, 0)
+                writer.write_int(enum_val)
+                layout_writer.log(f"enum({name})", field_name, enum_val)
 
+            else: # 是一个类
                 field_values = []
-                if isinstance(data, str) and delimiters:
+                if type(data) is str and depth < n_delimiters:
                     # 如果是包装类，字符串数据属于其内部字段，此处不分割
-                    if is_wrapper:
+                    if op.is_wrapper:
                         field_values = [data]
                     else:
-                        delimiter = delimiters.popleft()
+                        delimiter = delimiters[depth]
+                        depth += 1
                         field_values = data.split(delimiter)
-                elif isinstance(data, list):
+                elif type(data) is list:
                     field_values = data
 
-                self.layout_writer.enter_scope(f"{field_name}: {name}")
-                for i, field_def in enumerate(field_sequence):
-                    f_name = field_def["Field"]
-                    f_type_syntax = field_def["Type"]
-                    f_value = field_values[i] if i < len(field_values) else None
-                    self._write_recursive(f_value, f_type_syntax, f_name, delimiters.copy())
-                self.layout_writer.exit_scope()
+                layout_writer.enter_scope(f"{field_name}: {name}")
+                push(_SCOPE_EXIT_ENTRY)
+                field_ops = op.field_ops
+                if field_ops is None:
+                    field_ops = op.field_ops = [self._get_op(f_type_syntax) for _, f_type_syntax in op.fields]
+                n_values = len(field_values)
+                for i in range(len(field_ops) - 1, -1, -1):
+                    f_value = field_values[i] if i < n_values else None
+                    push((f_value, field_ops[i], op.fields[i][0], depth))
 
 class BinaryDataWriter:
     """
     接收 ConfigTable 对象，并协调将其序列化为二进制数据和布局文本的过程。
     """
-    def __init__(self, type_system):
+    def __init__(self, type_system, emit_layout: bool = True):
         self.type_system = type_system
+        self.emit_layout = emit_layout # 为 False 时不生成布局文本，省去逐值的 repr 与字符串拼接
+        # 写入器与处理器在所有表之间复用：每张表开始时重置，编译好的写入指令得以保留
+        self._writer = BinaryWriter()
+        self._layout_writer = LayoutWriter() if emit_layout else NullLayoutWriter()
+        self._handler = CustomBinaryDataHandler(type_system, self._writer, self._layout_writer)
 
     def write(self, table: ConfigTable) -> tuple[bytes, str]:
         """
@@ -230,11 +501,86 @@ class BinaryDataWriter:
             table: 待序列化的 ConfigTable 对象。
         
         Returns:
-            一个元组 (二进制数据, 布局文本)。
+            一个元组 (二进制数据, 布局文本)。未启用布局输出时布局文本为空字符串。
+        """
+        writer = self._writer
+        writer.reset()
+        layout_text = self._serialize(table)
+        return writer.buffer, layout_text
+
+    def write_to(self, table: ConfigTable, sink) -> tuple[int, str]:
+        """
+        将单个 ConfigTable 序列化，并把二进制数据分块直接写入 `sink`。
+        
+        Args:
+            table: 待序列化的 ConfigTable 对象。
+            sink: 接收二进制数据的流，例如以 'wb' 模式打开的文件。
+        
+        Returns:
+            一个元组 (写入的字节数, 布局文本)。
+        """
+        writer = self._writer
+        writer.reset(sink)
+        layout_text = self._serialize(table)
+        writer.flush()
+        return writer.bytes_written, layout_text
+
+    def write_file(self, table: ConfigTable, dat_filepath: str, layout_filepath: str | None = None):
+        """序列化单个 ConfigTable 并写出二进制文件；给出 layout_filepath 时同时写出布局文件。"""
+        with open(dat_filepath, 'wb') as f:
+            _, layout_text = self.write_to(table, f)
+        if layout_filepath is not None:
+            _write_text_file(layout_filepath, layout_text)
+
+    def write_files(self, jobs: list[tuple[ConfigTable, str, str | None]]) -> Iterator[tuple[str, str | None]]:
+        """
+        为多个配置表写出文件，每个任务为 `write_file` 的参数 (表, 二进制文件路径, 布局文件路径)。
+
+        各表的序列化互不依赖；表足够多且有多个 CPU 核心时交给进程池并行处理，每个工作进程只接收一次类型系统。
+        否则在当前进程中逐个序列化，磁盘写入交给一个 I/O 线程，与后续数据的序列化相互重叠。
+        按任务顺序产出已写出的 (二进制文件路径, 布局文件路径)。
         """
-        writer = BinaryWriter()
-        layout_writer = LayoutWriter()
-        handler = CustomBinaryDataHandler(self.type_system, writer, layout_writer)
+        workers = min(os.cpu_count() or 1, len(jobs))
+        if len(jobs) < PARALLEL_MIN_TABLES or workers < 2:
+            # 单个 I/O 线程按提交顺序执行写入，同一文件的数据块不会乱序
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as io_pool:
+                previous = None
+                for job in jobs:
+                    futures = self._submit_file_writes(job, io_pool)
+                    # 当前表序列化完成时，上一张表的写入通常也已结束
+                    if previous is not None:
+                        yield _wait_for_writes(*previous)
+                    previous = (job, futures)
+                if previous is not None:
+                    yield _wait_for_writes(*previous)
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_serialize_worker,
+            initargs=(self.type_system, self.emit_layout)
+        ) as executor:
+            for job, _ in zip(jobs, executor.map(_write_file_worker, *zip(*jobs))):
+                yield job[1], job[2]
+
+    def _submit_file_writes(self, job: tuple[ConfigTable, str, str | None],
+                            io_pool: concurrent.futures.Executor) -> list[concurrent.futures.Future]:
+        """在当前线程序列化一张表，其文件的所有写入操作都提交给 io_pool，返回这些写入的 Future。"""
+        table, dat_filepath, layout_filepath = job
+        futures = []
+        f = open(dat_filepath, 'wb')
+        try:
+            _, layout_text = self.write_to(table, _QueuedSink(f, io_pool, futures))
+        finally:
+            futures.append(io_pool.submit(f.close))
+        if layout_filepath is not None:
+            futures.append(io_pool.submit(_write_text_file, layout_filepath, layout_text))
+        return futures
+
+    def _serialize(self, table: ConfigTable) -> str:
+        """将表格数据写入已重置的二进制写入器，返回布局文本。"""
+        writer, layout_writer, handler = self._writer, self._layout_writer, self._handler
+        layout_writer.reset()
 
         if table.is_flat_table:
             layout_writer.log("Flat Table", table.target_type_name, f"from {table.excel_file_name}")
@@ -246,11 +592,90 @@ class BinaryDataWriter:
             layout_writer.log("Standard Table", table.target_type_name, f"{len(table.data_rows)} rows from {table.excel_file_name}")
             writer.write_int(len(table.data_rows))
             layout_writer.enter_scope("Data Rows")
+            # 每列的类型语法与上下文只取决于字段定义，在所有数据行间共享
+            field_specs = [(field_def.type_syntax, {'col': field_def.key}) for field_def in table.rows]
+            program = self._compile_row_program(handler, field_specs)
+            # 逐行逐列的热循环中先把方法绑定到局部变量，省去每次调用时的属性查找
+            write_value, write_fixed_run = handler.write_value, handler.write_fixed_run
+            enter_scope, exit_scope = layout_writer.enter_scope, layout_writer.exit_scope
+            streaming = writer.sink is not None
+            n_fields = len(field_specs)
             for i, data_row in enumerate(table.data_rows):
-                layout_writer.enter_scope(f"Row [{i}]")
-                for j, field_def in enumerate(table.rows):
-                    handler.write_value(data_row[j], field_def.type_syntax, {'col': field_def.key})
-                layout_writer.exit_scope()
+                enter_scope(f"Row [{i}]")
+                if program is not None and len(data_row) >= n_fields:
+                    for start, run, type_syntax, context in program:
+                        if run is None:
+                            write_value(data_row[start], type_syntax, context)
+                        else:
+                            write_fixed_run(data_row[start:run.stop], run)
+                else:
+                    # 按字段定义逐列取值：数据行比字段少时直接报错，不能截断成残缺的二进制
+                    for j, (type_syntax, context) in enumerate(field_specs):
+                        write_value(data_row[j], type_syntax, context)
+                exit_scope()
+                # 流式写出时按行检查，缓冲区足够大才写入一次
+                if streaming and len(writer.buffer) >= _FLUSH_THRESHOLD:
+                    writer.flush()
             layout_writer.exit_scope()
             
-        return writer.buffer, layout_writer.get_content()
+        return layout_writer.get_content()
+
+    @staticmethod
+    def _compile_row_program(handler: CustomBinaryDataHandler, field_specs: list[tuple[str, dict]]) -> list | None:
+        """
+        把一行的字段写入步骤编译为 (起始列, _FixedRun 或 None, 类型语法, 上下文) 列表：
+        两个及以上相邻的定长基元字段合并为一个 _FixedRun，其余字段逐个写入。
+        没有可合并的字段时返回 None，调用方直接逐字段写入。
+        """
+        kinds = [handler.fixed_width_kind(type_syntax) for type_syntax, _ in field_specs]
+        program = []
+        has_run = False
+        start = 0
+        while start < len(field_specs):
+            stop = start
+            while stop < len(field_specs) and kinds[stop] is not None:
+                stop += 1
+            if stop - start >= 2:
+                run = _FixedRun(stop, kinds[start:stop], field_specs[start:stop])
+                program.append((start, run, None, None))
+                has_run = True
+                start = stop
+            else:
+                type_syntax, context = field_specs[start]
+                program.append((start, None, type_syntax, context))
+                start += 1
+        return program if has_run else None
+
+class _QueuedSink:
+    """把每次 write 都提交给 I/O 线程执行的二进制流包装，写入的 Future 记录在 futures 中以便之后检查错误。"""
+    __slots__ = ('_file', '_executor', '_futures')
+
+    def __init__(self, file, executor: concurrent.futures.Executor, futures: list):
+        self._file = file
+        self._executor = executor
+        self._futures = futures
+
+    def write(self, data):
+        self._futures.append(self._executor.submit(self._file.write, data))
+
+def _write_text_file(filepath: str, text: str):
+    """以 UTF-8 写出文本文件。"""
+    with open(filepath, 'w', encoding='utf-8') as f: f.write(text)
+
+def _wait_for_writes(job: tuple[ConfigTable, str, str | None], futures: list) -> tuple[str, str | None]:
+    """等待一张表的所有写入完成（有错误时在此抛出），返回其 (二进制文件路径, 布局文件路径)。"""
+    for future in futures:
+        future.result()
+    return job[1], job[2]
+
+# 并行序列化时，每个工作进程通过 initializer 构造一次的写入器
+_worker_writer: BinaryDataWriter | None = None
+
+def _init_serialize_worker(type_system, emit_layout: bool):
+    """工作进程初始化函数：构造一次写入器，避免为每张表重复传输类型系统。"""
+    global _worker_writer
+    _worker_writer = BinaryDataWriter(type_system, emit_layout)
+
+def _write_file_worker(table: ConfigTable, dat_filepath: str, layout_filepath: str | None):
+    """在工作进程中序列化单个配置表并写出其文件。"""
+    _worker_writer.write_file(table, dat_filepath, layout_filepath)
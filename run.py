@@ -13,9 +13,9 @@ import tomli
 import os
 import shutil
 import importlib
-from config_generator.readers import ConfigReader
+from config_generator.readers import ConfigReader, TypeSystem
 from config_generator.writers import BinaryDataWriter
-from config_generator.codegens.base_generator import BaseCodeGenerator
+from config_generator.codegens.base_generator import BaseCodeGenerator, DependencyResolver
 from config_generator.wizard import typedef_command
 
 # --- 全局配置加载 ---
@@ -33,6 +33,7 @@ OUTPUT_DIR = cfg['paths']['output_dir']
 TEMP_DIR = cfg['paths']['temp_dir']
 DATA_LAYOUT_DIR = cfg['paths']['data_layout_dir']
 BINARY_COPY_DEST = cfg['paths']['binary_copy_destination']
+TYPE_CACHE_FILE = cfg['paths'].get('type_cache_file') or None
 TYPE_DEF_SUFFIX = cfg['file_suffixes']['type_def']
 INNER_TYPE_DEF_SUFFIX = cfg['file_suffixes']['inner_type_def']
 BINARY_EXTENSION = cfg['file_suffixes'].get('binary_extension', '.dat')
@@ -46,6 +47,18 @@ def get_generator_class(language: str) -> type[BaseCodeGenerator]:
     except (ImportError, AttributeError) as e:
         raise ImportError(f"无法为语言 '{language}'找到有效的生成器: {e}")
 
+def _copy_if_changed(src: str, dst: str) -> str:
+    """
+    作为 `shutil.copytree` 的 copy_function 使用：仅当目标文件不存在或内容不同时才复制。
+
+    内容未变化的文件保持原样（包括修改时间），下游编译器的增量构建因此不会重新编译它们。
+    """
+    if os.path.exists(dst) and os.path.getsize(src) == os.path.getsize(dst):
+        with open(src, 'rb') as f_src, open(dst, 'rb') as f_dst:
+            if f_src.read() == f_dst.read():
+                return dst
+    return shutil.copy2(src, dst)
+
 @click.group(context_settings=dict(help_option_names=['-h', '--help']))
 @click.pass_context
 def cli(ctx):
@@ -58,50 +71,54 @@ def cli(ctx):
 @cli.command()
 @click.option('--force', '-f', is_flag=True, help="强制重新生成所有配置，不进行询问。")
 @click.option('--debug', is_flag=True, help="启用调试模式，在出错时打印详细信息。")
-def generate(force, debug):
+@click.option('--emit-layout', is_flag=True, help="同时生成用于调试的二进制布局文件。")
+def generate(force, debug, emit_layout):
     """从Excel文件生成二进制数据和所有已启用的目标语言代码。"""
     click.echo(click.style("===== 运行生成器 =====", bold=True))
     if os.path.exists(TEMP_DIR): shutil.rmtree(TEMP_DIR)
     os.makedirs(TEMP_DIR)
 
     try:
-        reader = ConfigReader(INPUT_DIR, METADATA_DIR, TYPE_DEF_SUFFIX)
+        reader = ConfigReader(INPUT_DIR, METADATA_DIR, TYPE_DEF_SUFFIX, TYPE_CACHE_FILE)
         all_tables = reader.read_all()
+        # 在代码生成之前保存，缓存中只有从文件解析出的原始定义
+        reader.type_system.save_cache()
 
-        # 1. 生成二进制数据和布局文件
-        click.echo("\n>>> 正在生成二进制数据和布局文件...")
-        binary_writer = BinaryDataWriter(reader.type_system)
+        # 1. 生成二进制数据（以及可选的布局文件）
+        click.echo("\n>>> 正在生成二进制数据和布局文件..." if emit_layout else "\n>>> 正在生成二进制数据...")
+        binary_writer = BinaryDataWriter(reader.type_system, emit_layout=emit_layout)
         
         temp_data_dir = os.path.join(TEMP_DIR, "data")
         temp_layout_dir = os.path.join(TEMP_DIR, DATA_LAYOUT_DIR)
         os.makedirs(temp_data_dir, exist_ok=True)
-        os.makedirs(temp_layout_dir, exist_ok=True)
+        if emit_layout:
+            os.makedirs(temp_layout_dir, exist_ok=True)
         
-        for table in all_tables:
-            binary_data, layout_text = binary_writer.write(table)
-            
-            # 写入二进制文件
-            dat_filepath = os.path.join(temp_data_dir, f"{table.base_name}{BINARY_EXTENSION}")
-            with open(dat_filepath, 'wb') as f: f.write(binary_data)
+        # 各表互不依赖，可并行序列化；数据边序列化边写出，不在内存中保留整张表
+        jobs = [
+            (table,
+             os.path.join(temp_data_dir, f"{table.base_name}{BINARY_EXTENSION}"),
+             os.path.join(temp_layout_dir, f"{table.base_name}_layout.txt") if emit_layout else None)
+            for table in all_tables
+        ]
+        for dat_filepath, layout_filepath in binary_writer.write_files(jobs):
             click.echo(f"    - 已生成: {os.path.relpath(dat_filepath)}")
+            if layout_filepath:
+                click.echo(f"    - 已生成: {os.path.relpath(layout_filepath)}")
 
-            # 写入布局文件
-            layout_filepath = os.path.join(temp_layout_dir, f"{table.base_name}_layout.txt")
-            with open(layout_filepath, 'w', encoding='utf-8') as f: f.write(layout_text)
-            click.echo(f"    - 已生成: {os.path.relpath(layout_filepath)}")
-
-        # 2. 生成各语言代码
+        # 2. 生成各语言代码。依赖类型只解析一次，由所有目标语言共享
+        dependency_resolver = DependencyResolver(reader.type_system, all_tables)
         for target in cfg.get("targets", []):
             if not target.get("enabled"): continue
             lang = target['language']
             click.echo(f"\n>>> 正在为语言 '{lang}' 生成代码...")
             GeneratorClass = get_generator_class(lang)
-            generator = GeneratorClass(reader.type_system, TEMP_DIR, target)
+            generator = GeneratorClass(reader.type_system, TEMP_DIR, target, dependency_resolver)
             generator.generate_all(all_tables)
 
         # 3. 将所有临时文件移动到最终输出目录
         click.echo(click.style("\n>>> 所有文件处理成功。", fg='green', bold=True))
-        shutil.copytree(TEMP_DIR, OUTPUT_DIR, dirs_exist_ok=True)
+        shutil.copytree(TEMP_DIR, OUTPUT_DIR, dirs_exist_ok=True, copy_function=_copy_if_changed)
         
         # 4. 如果配置了复制目标路径，则执行复制操作
         if BINARY_COPY_DEST:
@@ -109,7 +126,7 @@ def generate(force, debug):
             final_data_dir = os.path.join(OUTPUT_DIR, "data")
             if os.path.exists(final_data_dir):
                 os.makedirs(BINARY_COPY_DEST, exist_ok=True)
-                shutil.copytree(final_data_dir, BINARY_COPY_DEST, dirs_exist_ok=True)
+                shutil.copytree(final_data_dir, BINARY_COPY_DEST, dirs_exist_ok=True, copy_function=_copy_if_changed)
                 click.echo(click.style("    - 复制成功。", fg='green'))
             else:
                 click.echo(click.style("    - 警告: 未找到 'output/data' 目录，跳过复制。", fg='yellow'))
@@ -127,6 +144,20 @@ def generate(force, debug):
         if os.path.exists(TEMP_DIR): shutil.rmtree(TEMP_DIR)
         click.echo("临时目录已清理。")
 
+@cli.command(name="compile-templates")
+def compile_templates():
+    """将配置了 compiled_templates 的目标语言模板预编译为 Python 模块包。"""
+    click.echo(click.style("===== 预编译模板 =====", bold=True))
+    type_system = TypeSystem(METADATA_DIR)
+    for target in cfg.get("targets", []):
+        if not target.get("compiled_templates"): continue
+        lang = target['language']
+        GeneratorClass = get_generator_class(lang)
+        generator = GeneratorClass(type_system, TEMP_DIR, target)
+        pack_path = generator.compile_templates()
+        click.echo(f"    - 已编译 '{lang}' 的模板: {pack_path}")
+    click.echo(click.style("===== 编译完毕! =====", bold=True))
+
 cli.add_command(generate)
 cli.add_command(typedef_command)
 
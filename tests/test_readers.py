@@ -0,0 +1,97 @@
+# ==============================================================================
+# TableCompiler
+# Copyright (c) 2025, Alex Liao. All rights reserved.
+#
+# This file is part of the TableCompiler project, a tool designed to
+# compile Excel configuration sheets into type-safe code and binary data
+# for high-performance projects.
+# ==============================================================================
+
+# /tests/test_readers.py
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import openpyxl
+
+from config_generator.models import ConfigTable
+from config_generator.readers import _read_excel_table
+
+HEADERS = ["Id", "Name", "A", "B", "C", "D", "Col", "Vals"]
+TYPEDEF = {
+    "TargetType": "Row",
+    "PrimaryKeyFields": ["Id"],
+    "FieldSequence": [{"Field": name, "Type": "string"} for name in HEADERS],
+}
+FLAT_TYPEDEF = {"TargetType": "Flat", "IsFlatTable": True}
+
+def _set_dimension(path: str, ref: str):
+    """把工作表中记录的 <dimension> 改写为 ref，模拟其他工具留下的过期尺寸。"""
+    with zipfile.ZipFile(path) as src:
+        entries = [(info, src.read(info.filename)) for info in src.infolist()]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info, data in entries:
+            if info.filename == "xl/worksheets/sheet1.xml":
+                data = re.sub(rb'<dimension ref="[^"]*"', f'<dimension ref="{ref}"'.encode(), data)
+            dst.writestr(info, data)
+
+class ReadExcelTableStaleDimensionTest(unittest.TestCase):
+    """工作表记录的尺寸过期时，读取结果应与尺寸正确时一致。"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _save(self, rows: list[list]) -> str:
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        for row in rows:
+            sheet.append(row)
+        path = os.path.join(self.tmp_dir, "T00.xlsx")
+        workbook.save(path)
+        return path
+
+    def _read(self, path: str, typedef: dict, is_flat: bool = False) -> ConfigTable:
+        table = ConfigTable("T00.xlsx", "T00", is_flat, typedef["TargetType"], primary_key_fields=typedef.get("PrimaryKeyFields", []))
+        return _read_excel_table(path, typedef, table)
+
+    def _standard_rows(self) -> list[list]:
+        rows = [["测试表"], HEADERS]
+        for i in range(30):
+            row = [str(i), f"n{i}", "a", "b", "c", "d", "col", "vals"]
+            if i % 3 == 0:
+                row[-2:] = [None, None] # 末尾为空的短行
+            rows.append(row)
+        rows.insert(10, []) # 中间的空行
+        return rows
+
+    def test_stale_row_range_keeps_all_rows(self):
+        path = self._save(self._standard_rows())
+        expected = self._read(path, TYPEDEF).data_rows
+        self.assertEqual(len(expected), 30)
+
+        _set_dimension(path, "A1:H10")
+        self.assertEqual(self._read(path, TYPEDEF).data_rows, expected)
+
+    def test_stale_column_range_keeps_all_columns(self):
+        path = self._save(self._standard_rows())
+        expected = self._read(path, TYPEDEF).data_rows
+
+        _set_dimension(path, "A1:F10")
+        self.assertEqual(self._read(path, TYPEDEF).data_rows, expected)
+
+    def test_stale_dimension_flat_table(self):
+        rows = [["Key", "Type", "Value", "Comment"]] + [[f"K{i}", "int", i] for i in range(20)]
+        path = self._save(rows)
+        _set_dimension(path, "A1:B5")
+        table = self._read(path, FLAT_TYPEDEF, is_flat=True)
+        self.assertEqual([(row.key, row.value, row.comment) for row in table.rows],
+                         [(f"K{i}", i, None) for i in range(20)])
+
+if __name__ == '__main__':
+    unittest.main()
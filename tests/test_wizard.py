@@ -0,0 +1,43 @@
+# ==============================================================================
+# TableCompiler
+# Copyright (c) 2025, Alex Liao. All rights reserved.
+#
+# This file is part of the TableCompiler project, a tool designed to
+# compile Excel configuration sheets into type-safe code and binary data
+# for high-performance projects.
+# ==============================================================================
+
+# /tests/test_wizard.py
+import os
+import shutil
+import tempfile
+import unittest
+
+import openpyxl
+
+from config_generator.wizard import _read_excel_headers
+from tests.test_readers import HEADERS, _set_dimension
+
+class ReadExcelHeadersStaleDimensionTest(unittest.TestCase):
+    """工作表记录的尺寸过期时，向导仍应读到完整的表头。"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_stale_column_range_keeps_all_headers(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["编号", "名称"])
+        workbook.active.append(HEADERS)
+        path = os.path.join(self.tmp_dir, "T00.xlsx")
+        workbook.save(path)
+
+        _set_dimension(path, "A1:F10")
+        headers, comments = _read_excel_headers(path)
+        self.assertEqual(headers, HEADERS)
+        self.assertEqual(comments, {"Id": "编号", "Name": "名称", **{h: None for h in HEADERS[2:]}})
+
+if __name__ == '__main__':
+    unittest.main()